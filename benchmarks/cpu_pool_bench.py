@@ -0,0 +1,96 @@
+"""
+CpuPool benchmark - spell correction + bulk normalization inline बनाम process pool।
+Query latency के साथ event loop lag भी मापता है (यही file streams को रोकता है)।
+
+    python -m benchmarks.cpu_pool_bench --workers 2 --queries 300
+"""
+import time
+import random
+import asyncio
+import argparse
+
+from database.spell import SymSpell, rank_candidates
+from database.cpu_pool import CpuPool
+from database.file_meta import search_fields_batch, normalize_query
+from benchmarks.search_bench import make_corpus, LANGUAGES, QUALITIES
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def typo(word, rnd):
+    i = rnd.randrange(len(word))
+    return word[:i] + rnd.choice("abcdefghijklmnopqrstuvwxyz") + word[i + 1:]
+
+
+async def loop_lag(stop, lags, tick=0.005):
+    """Ticker - हर tick कितनी देर से जागा"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(time.perf_counter() - start - tick)
+
+
+async def run_mode(pool, spell, queries, batches, concurrency):
+    stop, lags, latencies = asyncio.Event(), [], []
+    ticker = asyncio.create_task(loop_lag(stop, lags))
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(q):
+        async with sem:
+            start = time.perf_counter()
+            await pool.run(rank_candidates, spell.candidates(q))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    spell_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for batch in batches:
+        await pool.run(search_fields_batch, batch, LANGUAGES, QUALITIES)
+    batch_time = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    return spell_time, latencies, batch_time, lags
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    docs, vocab = make_corpus(args.docs, 20000, args.seed)
+    spell = SymSpell()
+    for doc in docs:
+        spell.add_text(normalize_query(doc["file_name"]))
+    rnd = random.Random(args.seed)
+    queries = [" ".join(typo(w, rnd) for w in rnd.choices(vocab, k=3)) for _ in range(args.queries)]
+    texts = [(doc["file_name"], "") for doc in docs]
+    batches = [texts[i:i + 5000] for i in range(0, len(texts), 5000)]
+
+    print(f"queries={args.queries} docs={args.docs} concurrency={args.concurrency}")
+    print(f"{'mode':<10} {'spell s':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch s':>8} {'lag p50':>8} {'lag p99':>8} {'lag max':>8}")
+    for workers in (0, args.workers):
+        pool = CpuPool(workers)
+        if workers:
+            # Worker startup (spawn) measurement से बाहर
+            await pool.run(rank_candidates, [])
+        spell_time, lat, batch_time, lags = await run_mode(pool, spell, queries, batches, args.concurrency)
+        pool.shutdown()
+        name = f"pool x{workers}" if workers else "inline"
+        print(
+            f"{name:<10} {spell_time:>8.2f} {pct(lat, .5):>8.1f} {pct(lat, .95):>8.1f} {batch_time:>8.2f} "
+            f"{pct(lags, .5):>8.1f} {pct(lags, .99):>8.1f} {max(lags) * 1000:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
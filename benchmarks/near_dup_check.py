@@ -0,0 +1,74 @@
+"""
+Near-duplicate guard का regression check - असली re-upload pairs बनाम अलग files।
+हर pair पर LSH candidate + is_near_dup देखता है; कोई गलत फैसला हो तो exit 1।
+
+    python -m benchmarks.near_dup_check --threshold 0.85
+"""
+import sys
+import argparse
+
+from database.near_dup import near_dup_fields, lookup_keys, is_near_dup
+from database.file_meta import extract_meta
+from benchmarks.search_bench import LANGUAGES, QUALITIES
+
+# एक ही file - separators, extension, channel tag, bracket prefix बदले
+SAME = [
+    ("Movie.2010.720p.x264.mkv", "Movie 2010 720p x264 .mp4"),
+    ("Inception.2010.720p.BluRay.x264.mkv", "Inception (2010) 720p BluRay x264 @MoviesHub.mkv"),
+    ("KGF Chapter 2 (2022) Hindi 720p HDRip x264 AAC.mkv", "KGF.Chapter.2.2022.Hindi.720p.HDRip.x264.AAC.mkv"),
+    ("The.Dark.Knight.2008.720p.BrRip.x264.YIFY.mp4", "[TamilRockers] The Dark Knight 2008 720p BrRip x264 YIFY.mp4"),
+    ("Breaking.Bad.S01E03.720p.BluRay.x264.mkv", "Breaking Bad S01E03 720p BluRay x264 .mkv"),
+    ("Dune.Part.Two.2024.2160p.WEB-DL.DDP5.1.Atmos.mkv", "Dune Part Two 2024 2160p WEB-DL DDP5.1 Atmos.mkv"),
+    ("Naruto Shippuden Ep123 Hindi 480p.mkv", "Naruto.Shippuden.Ep123.Hindi.480p @chan.mkv"),
+    ("Lord.of.the.Rings.Extended.CD1.720p", "Lord of the Rings Extended CD1 720p.mp4"),
+]
+# अलग files - नाम 80-95% मिलता है
+DIFFERENT = [
+    ("Lord.of.the.Rings.Extended.CD1.720p", "Lord.of.the.Rings.Extended.CD2.720p"),
+    ("Game.of.Thrones.Complete.Part.1", "Game.of.Thrones.Complete.Part.2"),
+    ("Kill.Bill.Vol.1.2003.720p.BluRay.mkv", "Kill.Bill.Vol.2.2004.720p.BluRay.mkv"),
+    ("Dune.Part.One.2021.1080p.mkv", "Dune.Part.Two.2024.1080p.mkv"),
+    ("Toy.Story.2.1999.720p.BluRay.mkv", "Toy.Story.3.2010.720p.BluRay.mkv"),
+    ("The.Office.S02E01.720p.mkv", "The.Office.S02E02.720p.mkv"),
+    ("Movie.Name.2020.720p.Hindi.mkv", "Movie.Name.2020.720p.Tamil.mkv"),
+    # सिर्फ episode number अलग - episode meta नहीं निकलता
+    ("Naruto Shippuden Ep123 Hindi 480p", "Naruto Shippuden Ep124 Hindi 480p"),
+    ("One Piece E1001 Hindi 720p", "One Piece E1002 Hindi 720p"),
+    ("Anupamaa Episode12 720p", "Anupamaa Episode13 720p"),
+    ("Friends 1x05 720p", "Friends 1x06 720p"),
+    ("Friends 1x05 720p", "Friends 5x01 720p"),
+]
+
+
+def make_doc(file_name, file_size=700 << 20):
+    doc = {"_id": file_name, "file_name": file_name, "file_size": file_size}
+    doc.update(extract_meta(file_name, LANGUAGES, QUALITIES))
+    doc.update(near_dup_fields(file_name, file_size))
+    return doc
+
+
+def judge(a, b, threshold):
+    """b save हो रही है, a पहले से DB में - LSH candidate बनेगा और guard पास होगा?"""
+    old, new = make_doc(a), make_doc(b)
+    candidate = bool(set(old["lsh"]) & set(lookup_keys(new["mh"], new["file_size"])))
+    return candidate and is_near_dup(old, new, threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+
+    missed = [pair for pair in SAME if not judge(*pair, args.threshold)]
+    false = [pair for pair in DIFFERENT if judge(*pair, args.threshold)]
+    print(f"same: {len(SAME) - len(missed)}/{len(SAME)} matched, "
+          f"different: {len(false)}/{len(DIFFERENT)} wrongly matched")
+    for a, b in missed:
+        print(f"  missed: {a!r} ~ {b!r}")
+    for a, b in false:
+        print(f"  false : {a!r} ~ {b!r}")
+    return 1 if missed or false else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Local search engines का benchmark - synthetic filenames पर RAM/doc और QPS।
+MongoDB / Telegram की जरूरत नहीं।
+
+    python -m benchmarks.search_bench --docs 1000000 --queries 2000
+"""
+import time
+import random
+import argparse
+import tracemalloc
+
+from database.search_index import InvertedIndex
+from database.columnar_index import ColumnarIndex
+# Production वाला normalizer (digit translation समेत) - tokens bot जैसे ही बनें
+from database.file_meta import normalize_query
+
+SOURCES = ["primary", "cloud", "archive"]
+QUALITIES = ["480p", "720p", "1080p", "2160p"]
+LANGUAGES = ["hindi", "english", "tamil", "telugu"]
+
+
+def make_corpus(n, vocab_size, seed):
+    rnd = random.Random(seed)
+    vocab = ["".join(rnd.choices("abcdefghijklmnopqrstuvwxyz", k=rnd.randint(3, 9))) for _ in range(vocab_size)]
+    docs = []
+    for i in range(n):
+        words = rnd.choices(vocab, k=rnd.randint(2, 5))
+        quality, lang = rnd.choice(QUALITIES), rnd.choice(LANGUAGES)
+        docs.append({
+            "_id": f"BAAC{i:020d}",
+            "file_name": f"{' '.join(words).title()} {rnd.randint(1990, 2024)} {lang} {quality}.mkv",
+            "file_size": rnd.randint(1, 4 << 30),
+            "lang": [lang], "quality": quality
+        })
+    return docs, vocab
+
+
+def build(engine, docs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    # Startup build जैसे 5000 के batches
+    for i in range(0, len(docs), 5000):
+        engine.add_many(docs[i:i + 5000], SOURCES[0])
+    elapsed = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, used
+
+
+def run_queries(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q, SOURCES[0], 0, 10)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--vocab", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-dict", action="store_true", help="InvertedIndex (dict) compare skip करें")
+    args = parser.parse_args()
+
+    docs, vocab = make_corpus(args.docs, args.vocab, args.seed)
+    rnd = random.Random(args.seed + 1)
+    # get_search_results की तरह backend तक normalized query पहुँचती है
+    queries = [normalize_query(" ".join(rnd.choices(vocab, k=rnd.randint(1, 3)))) for _ in range(args.queries)]
+    prefixes = [" ".join(w[:4] for w in q.split()) for q in queries]
+
+    engines = [("columnar", ColumnarIndex(normalize_query, SOURCES, LANGUAGES, QUALITIES))]
+    if not args.skip_dict:
+        engines.append(("memory", InvertedIndex(normalize_query)))
+
+    print(f"docs={args.docs} queries={args.queries} vocab={args.vocab}")
+    print(f"{'engine':<10} {'build s':>8} {'bytes/doc':>10} {'search qps':>11} {'prefix qps':>11}")
+    for name, engine in engines:
+        elapsed, used = build(engine, docs)
+        qps = run_queries(engine.search, queries)
+        pqps = run_queries(engine.prefix_search, prefixes)
+        print(f"{name:<10} {elapsed:>8.1f} {used / args.docs:>10.0f} {qps:>11.0f} {pqps:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
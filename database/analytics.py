@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────
+# 📊 QUERY ANALYTICS (RING BUFFER)
+# ─────────────────────────────────────────
+class QueryRecorder:
+    """
+    हर search का record RAM ring buffer में, और हर `interval` सेकंड में
+    एक insert_many से DB में - per-search write नहीं।
+    Buffer भर जाए (DB down) तो सबसे पुराने records drop होते हैं।
+    """
+
+    def __init__(self, write, size=10000, interval=10):
+        self._write = write
+        self.interval = interval
+        self.buffer = deque(maxlen=size)
+        self.recorded = 0
+        self.written = 0
+
+    @property
+    def dropped(self):
+        return self.recorded - self.written - len(self.buffer)
+
+    def record(self, entry):
+        self.buffer.append(entry)
+        self.recorded += 1
+
+    async def flush(self):
+        if not self.buffer:
+            return
+        batch = list(self.buffer)
+        self.buffer.clear()
+        try:
+            await self._write(batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Query log flush failed: {e}")
+            # वापस buffer के आगे - सिर्फ उतने जितनी जगह है, और batch के सबसे पुराने
+            # drop (full deque पर extendleft दाईं ओर से, यानी नए records गिराता)
+            room = self.buffer.maxlen - len(self.buffer)
+            if room > 0:
+                self.buffer.extendleft(reversed(batch[-room:]))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def stats(self):
+        return {"recorded": self.recorded, "written": self.written, "pending": len(self.buffer), "dropped": self.dropped}
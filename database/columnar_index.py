@@ -0,0 +1,446 @@
+import hashlib
+import logging
+import threading
+from bisect import bisect_left
+import numpy as np
+from database.file_meta import prefix_terms
+from database.search_index import NAME_WEIGHT
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────
+# 📦 GROWABLE NUMPY COLUMN
+# ─────────────────────────────────────────
+class _Column:
+    """Append-only numpy array (capacity doubling) - per-doc Python objects नहीं"""
+
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def _reserve(self, extra):
+        need = self.size + extra
+        if need > len(self.data):
+            grown = np.empty(max(need, len(self.data) * 2), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+
+    def append(self, value):
+        self._reserve(1)
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        self._reserve(len(values))
+        self.data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    @property
+    def view(self):
+        return self.data[:self.size]
+
+    def nbytes(self):
+        return self.data.nbytes
+
+
+def _id_key(file_id):
+    """file _id → (bytes, kind) - kind 1 = Binary/bytes, 0 = string"""
+    if isinstance(file_id, bytes):
+        return bytes(file_id), 1
+    return str(file_id).encode(), 0
+
+
+def _id_hash(raw, kind):
+    digest = hashlib.blake2b(bytes([kind]) + raw, digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def _source_key(hashes, codes):
+    """id hash + collection code → एक int64 key (एक file कई collections में हो सकती है)"""
+    return np.asarray(hashes, dtype=np.int64) ^ (np.asarray(codes, dtype=np.int64) << 56)
+
+
+# ─────────────────────────────────────────
+# 🧮 COLUMNAR IN-RAM INDEX (NUMPY)
+# ─────────────────────────────────────────
+class ColumnarIndex:
+    """
+    पूरा corpus compact numpy columns में: names/ids एक byte blob + offsets,
+    हर doc के token ids एक CSR array में। Query पर token array का
+    vectorized scan - dict-per-document वाले index से कई गुना कम RAM।
+    सिर्फ file_name indexed है (caption नहीं) - short filenames के लिए बना।
+    Methods lock लेते हैं - async code इन्हें thread में चलाता है।
+    """
+
+    def __init__(self, normalize, sources, languages=(), qualities=()):
+        self.normalize = normalize
+        self.sources = {name: code for code, name in enumerate(sources)}
+        self.languages = {lang: bit for bit, lang in enumerate(languages[:32])}
+        self.qualities = {q: code for code, q in enumerate(qualities[:127])}
+
+        self.terms = {}              # token -> token id
+        self.vocab = []              # sorted tokens (prefix lookup)
+        self.df = _Column(np.int32)  # token id -> document frequency
+
+        # Doc columns (row = insert order)
+        self.name_blob = _Column(np.uint8, 1 << 16)
+        self.name_off = _Column(np.int64)
+        self.id_blob = _Column(np.uint8, 1 << 16)
+        self.id_off = _Column(np.int64)
+        self.id_kind = _Column(np.uint8)
+        self.id_hash = _Column(np.int64)
+        self.size = _Column(np.int64)
+        self.source = _Column(np.uint8)
+        self.alive = _Column(np.bool_)
+        self.lang = _Column(np.uint32)
+        self.quality = _Column(np.int8)
+        self.year = _Column(np.int16)
+        self.season = _Column(np.int16)
+        self.episode = _Column(np.int16)
+
+        # Token occurrences (CSR): tok_off[row] .. tok_off[row + 1]
+        self.tok_ids = _Column(np.int32, 1 << 14)
+        self.tok_doc = _Column(np.int32, 1 << 14)
+        self.tok_off = _Column(np.int64)
+
+        for col in (self.name_off, self.id_off, self.tok_off):
+            col.append(0)
+        self.count = 0
+        self._vocab_dirty = False
+        # Term-sorted postings (lazy) - _postings() देखें
+        self._order = np.empty(0, dtype=np.int32)
+        self._starts = np.zeros(1, dtype=np.int64)
+        self._sorted_n = 0
+        # (collection, _id) keys का sorted index (lazy) - _key_index() देखें
+        self._key_sorted = np.empty(0, dtype=np.int64)
+        self._key_rows = np.empty(0, dtype=np.int64)
+        self._keyed_n = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    # ─── WRITE ───
+    def _term(self, token):
+        tid = self.terms.get(token)
+        if tid is None:
+            tid = len(self.terms)
+            self.terms[token] = tid
+            # Append + lazy sort (timsort sorted prefix + छोटी tail पर तेज़ है)
+            self.vocab.append(token)
+            self._vocab_dirty = True
+            self.df.append(0)
+        return tid
+
+    def _key_index(self):
+        """
+        Row keys (id hash + collection) sorted - lookup binary search है,
+        सिर्फ बाद में जुड़ी rows (tail) linear। Dead rows index में रहती हैं,
+        _find उन्हें alive से छाँटता है। Tail बड़ी होने पर ही दोबारा sort।
+        """
+        n = self.id_hash.size
+        if n - self._keyed_n > max(4096, self._keyed_n // 20):
+            keys = _source_key(self.id_hash.data[:n], self.source.data[:n])
+            self._key_rows = np.argsort(keys, kind="stable")
+            self._key_sorted = keys[self._key_rows]
+            self._keyed_n = n
+        return n
+
+    def _candidates(self, keys):
+        """keys में से कौन से index में हो सकते हैं (hash match, exact check _find में)"""
+        n = self._key_index()
+        tail = _source_key(self.id_hash.data[self._keyed_n:n], self.source.data[self._keyed_n:n])
+        hit = np.isin(keys, tail)
+        if len(self._key_sorted):
+            pos = np.minimum(np.searchsorted(self._key_sorted, keys), len(self._key_sorted) - 1)
+            hit |= self._key_sorted[pos] == keys
+        return hit
+
+    def _find(self, raw, kind, code):
+        """(collection, file _id) की live row या None"""
+        n = self._key_index()
+        key = _source_key(_id_hash(raw, kind), code)
+        lo = np.searchsorted(self._key_sorted, key, side="left")
+        hi = np.searchsorted(self._key_sorted, key, side="right")
+        tail = _source_key(self.id_hash.data[self._keyed_n:n], self.source.data[self._keyed_n:n])
+        rows = np.concatenate((self._key_rows[lo:hi], np.flatnonzero(tail == key) + self._keyed_n))
+        ids, off = self.id_blob.view, self.id_off.view
+        for row in rows:
+            if (
+                self.alive.data[row] and self.id_kind.data[row] == kind
+                and ids[off[row]:off[row + 1]].tobytes() == raw
+            ):
+                return int(row)
+        return None
+
+    def _append(self, items, source, hashes=None):
+        """items: [(doc, raw id, kind)] - हर column में एक ही extend"""
+        row = self.size.size
+        code = self.sources[source]
+        names, name_ends, ids, id_ends = bytearray(), [], bytearray(), []
+        name_base, id_base = self.name_blob.size, self.id_blob.size
+        langs, tok_ids, tok_doc, tok_ends = [], [], [], []
+        for doc, raw, kind in items:
+            name = doc.get("file_name") or ""
+            names += name.encode()
+            name_ends.append(name_base + len(names))
+            ids += raw
+            id_ends.append(id_base + len(ids))
+
+            lang = 0
+            for value in doc.get("lang") or ():
+                if value in self.languages:
+                    lang |= 1 << self.languages[value]
+            langs.append(lang)
+
+            tids = sorted({self._term(t) for t in self.normalize(name).split()})
+            tok_ids += tids
+            tok_doc += [row] * len(tids)
+            tok_ends.append(self.tok_ids.size + len(tok_ids))
+            row += 1
+
+        self.name_blob.extend(np.frombuffer(bytes(names), dtype=np.uint8))
+        self.name_off.extend(name_ends)
+        self.id_blob.extend(np.frombuffer(bytes(ids), dtype=np.uint8))
+        self.id_off.extend(id_ends)
+        self.id_kind.extend([kind for _, _, kind in items])
+        self.id_hash.extend(hashes if hashes is not None else [_id_hash(raw, kind) for _, raw, kind in items])
+        self.size.extend([doc.get("file_size", 0) or 0 for doc, _, _ in items])
+        self.source.extend(np.full(len(items), code))
+        self.alive.extend(np.ones(len(items), dtype=np.bool_))
+        self.lang.extend(langs)
+        self.quality.extend([self.qualities.get(doc.get("quality"), -1) for doc, _, _ in items])
+        self.year.extend([doc.get("year") or -1 for doc, _, _ in items])
+        self.season.extend([doc.get("season", -1) for doc, _, _ in items])
+        self.episode.extend([doc.get("episode", -1) for doc, _, _ in items])
+
+        tok_ids = np.asarray(tok_ids, dtype=np.int32)
+        np.add.at(self.df.data, tok_ids, 1)
+        self.tok_ids.extend(tok_ids)
+        self.tok_doc.extend(tok_doc)
+        self.tok_off.extend(tok_ends)
+        self.count += len(items)
+
+    def add(self, doc, source):
+        raw, kind = _id_key(doc["_id"])
+        code = self.sources[source]
+        with self._lock:
+            if self._find(raw, kind, code) is not None:
+                return False
+            self._append([(doc, raw, kind)], source)
+        return True
+
+    def add_many(self, docs, source):
+        """
+        Batch insert - पहले से मौजूद (collection, _id) skip। Startup scan और
+        indexing / resume के batches overlap कर सकते हैं, इसलिए हमेशा check।
+        """
+        code = self.sources[source]
+        keyed = [(doc, *_id_key(doc["_id"])) for doc in docs]
+        hashes = [_id_hash(raw, kind) for _, raw, kind in keyed]
+        keys = _source_key(hashes, code)
+        items, kept, seen = [], [], set()
+        with self._lock:
+            maybe = self._candidates(keys) if len(keys) else keys
+            for item, h, hit in zip(keyed, hashes, maybe):
+                _, raw, kind = item
+                if (h, raw) in seen or (hit and self._find(raw, kind, code) is not None):
+                    continue
+                seen.add((h, raw))
+                items.append(item)
+                kept.append(h)
+            if items:
+                self._append(items, source, kept)
+        return len(items)
+
+    def remove(self, file_ids, source):
+        removed = 0
+        code = self.sources[source]
+        with self._lock:
+            df, tok_ids, tok_off = self.df.data, self.tok_ids.view, self.tok_off.view
+            for file_id in file_ids:
+                raw, kind = _id_key(file_id)
+                row = self._find(raw, kind, code)
+                if row is None:
+                    continue
+                # Row dead mark - arrays compact नहीं होते (deletes rare हैं)
+                self.alive.data[row] = False
+                np.subtract.at(df, tok_ids[tok_off[row]:tok_off[row + 1]], 1)
+                self.count -= 1
+                removed += 1
+        return removed
+
+    # ─── READ ───
+    def _postings(self):
+        """
+        Token occurrences term id से sorted (argsort) - search सिर्फ
+        अपने terms की slices पढ़ती है। बाद में जुड़े tokens (tail) linear
+        scan होते हैं; tail बड़ी हो जाए तब ही दोबारा sort।
+        """
+        n = self.tok_ids.size
+        if n - self._sorted_n > max(50000, self._sorted_n // 20):
+            ids = self.tok_ids.data[:n]
+            self._order = np.argsort(ids, kind="stable").astype(np.int32)
+            self._starts = np.concatenate(([0], np.cumsum(np.bincount(ids, minlength=len(self.terms)))))
+            self._sorted_n = n
+        return n
+
+    def _rows_with(self, tids):
+        """किसी भी token id वाली rows + हर occurrence का token id"""
+        n = self._postings()
+        known = tids[tids < len(self._starts) - 1]
+        parts = [self._order[self._starts[t]:self._starts[t + 1]] for t in known]
+        tail = np.flatnonzero(np.isin(self.tok_ids.data[self._sorted_n:n], tids)) + self._sorted_n
+        pos = np.concatenate(parts + [tail.astype(np.int32)])
+        return self.tok_doc.data[pos], self.tok_ids.data[pos]
+
+    def _filter(self, rows, source, flt):
+        return filter_rows(self, rows, source, flt)
+
+    # ─── SEGMENT API (snapshot + delta एक साथ score होते हैं) ───
+    def _tid(self, token):
+        return self.terms.get(token)
+
+    def _df(self, tids):
+        return self.df.data[tids]
+
+    def _prefix_tids(self, term):
+        if self._vocab_dirty:
+            self.vocab.sort()
+            self._vocab_dirty = False
+        tids = []
+        i = bisect_left(self.vocab, term)
+        while i < len(self.vocab) and self.vocab[i].startswith(term):
+            tids.append(self.terms[self.vocab[i]])
+            i += 1
+        return np.array(tids, dtype=np.int32)
+
+    def _doc(self, row, score):
+        return make_doc(self, row, score)
+
+    def search(self, query, source, offset=0, limit=10, flt=None):
+        """(docs, total) - InvertedIndex.search जैसा idf-weighted OR"""
+        with self._lock:
+            return search_segments([self], query, source, offset, limit, flt)
+
+    def prefix_search(self, query, source, offset=0, limit=10, flt=None):
+        """हर query token किसी शब्द का prefix (AND) - "stran thin" """
+        with self._lock:
+            return prefix_search_segments([self], query, source, offset, limit, flt)
+
+    def memory(self):
+        """Numpy columns के bytes (token dictionary अलग)"""
+        return sum(
+            col.nbytes() for col in vars(self).values() if isinstance(col, _Column)
+        )
+
+
+# ─────────────────────────────────────────
+# 🔎 SEGMENT SEARCH (SHARED SCORING)
+# ─────────────────────────────────────────
+# Segment = ColumnarIndex या mmap snapshot - दोनों में same column names
+# (alive, source, lang, quality, year, season, episode, *_blob, *_off ...)
+
+def filter_rows(seg, rows, source, flt):
+    code = seg.sources.get(source)
+    if code is None:
+        return np.zeros(len(rows), dtype=np.bool_)
+    mask = seg.alive.data[rows] & (seg.source.data[rows] == code)
+    for key, value in (flt or {}).items():
+        if key == "lang":
+            bit = seg.languages.get(value)
+            if bit is None:
+                return np.zeros(len(rows), dtype=np.bool_)
+            mask &= (seg.lang.data[rows] & np.uint32(1 << bit)) != 0
+        elif key == "quality":
+            mask &= seg.quality.data[rows] == seg.qualities.get(value, -2)
+        else:
+            mask &= getattr(seg, key).data[rows] == value
+    return mask
+
+
+def make_doc(seg, row, score):
+    ids, id_off = seg.id_blob.data, seg.id_off.data
+    names, name_off = seg.name_blob.data, seg.name_off.data
+    raw = ids[id_off[row]:id_off[row + 1]].tobytes()
+    return {
+        "_id": raw if seg.id_kind.data[row] else raw.decode(),
+        "file_name": names[name_off[row]:name_off[row + 1]].tobytes().decode(),
+        "file_size": int(seg.size.data[row]),
+        "score": float(score)
+    }
+
+
+def search_segments(segments, query, source, offset=0, limit=10, flt=None):
+    """सभी segments पर idf-weighted OR - df / doc count सबका जोड़"""
+    tokens = sorted(set(query.split()))
+    if not tokens:
+        return [], 0
+    per_seg = [[seg._tid(t) for t in tokens] for seg in segments]
+    df = np.zeros(len(tokens))
+    for seg, tids in zip(segments, per_seg):
+        for i, tid in enumerate(tids):
+            if tid is not None:
+                df[i] += seg._df(tid)
+    if not df.any():
+        return [], 0
+    n_docs = max(sum(len(seg) for seg in segments), 1)
+    idf = np.log1p(n_docs / np.maximum(df, 1))
+
+    parts = []
+    for seg, tids in zip(segments, per_seg):
+        pairs = sorted((tid, idf[i]) for i, tid in enumerate(tids) if tid is not None)
+        if not pairs:
+            continue
+        t = np.array([p[0] for p in pairs], dtype=np.int32)
+        w = np.array([p[1] for p in pairs])
+        rows, matched = seg._rows_with(t)
+        weights = NAME_WEIGHT * w[np.searchsorted(t, matched)]
+        rows, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        mask = seg._filter(rows, source, flt)
+        parts.append((seg, rows[mask], scores[mask]))
+    return _page(parts, offset, limit)
+
+
+def prefix_search_segments(segments, query, source, offset=0, limit=10, flt=None):
+    """हर term किसी शब्द का prefix (AND), हर segment में अलग से"""
+    terms = prefix_terms(query)
+    if not terms:
+        return [], 0
+    parts = []
+    for seg in segments:
+        rows = None
+        for term in terms:
+            tids = seg._prefix_tids(term)
+            hit = np.unique(seg._rows_with(tids)[0]) if len(tids) else np.empty(0, dtype=np.int32)
+            rows = hit if rows is None else np.intersect1d(rows, hit, assume_unique=True)
+            if not len(rows):
+                break
+        if rows is not None and len(rows):
+            rows = rows[seg._filter(rows, source, flt)]
+            parts.append((seg, rows, np.full(len(rows), float(NAME_WEIGHT * len(terms)))))
+    return _page(parts, offset, limit)
+
+
+def _page(parts, offset, limit):
+    if not parts:
+        return [], 0
+    segs = np.concatenate([np.full(len(rows), i, dtype=np.int32) for i, (_, rows, _) in enumerate(parts)])
+    rows = np.concatenate([rows for _, rows, _ in parts]).astype(np.int64)
+    scores = np.concatenate([scores for _, _, scores in parts])
+    total = len(rows)
+    if offset >= total:
+        return [], total
+
+    k = offset + limit
+    if total > k:
+        # Top-k threshold - उसके बराबर वाले ties भी रखें ताकि pages stable रहें
+        kth = np.partition(scores, total - k)[total - k]
+        keep = scores >= kth
+        segs, rows, scores = segs[keep], rows[keep], scores[keep]
+    # score desc, फिर segment, फिर row (insert order)
+    order = np.lexsort((rows, segs, -scores))[offset:k]
+    return [parts[segs[i]][0]._doc(rows[i], scores[i]) for i in order], total
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────
+# 🧵 PROCESS POOL (CPU-BOUND SEARCH WORK)
+# ─────────────────────────────────────────
+class CpuPool:
+    """
+    Fuzzy matching / bulk normalization जैसा CPU काम अलग processes में,
+    ताकि event loop (Telegram updates + file streaming) न रुके।
+    workers = 0 → सब inline (पहले जैसा)। Functions top-level और
+    plain data वाले होने चाहिए (pickle)।
+    """
+
+    def __init__(self, workers=0):
+        self.workers = workers
+        self.calls = 0
+        self.inline = 0
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn: Motor / aiohttp threads वाले process को fork नहीं करते।
+            # Worker parent का __main__ (bot.py) __mp_main__ की तरह दोबारा चलाता है -
+            # इसलिए bot.py हल्का है और bot / Motor / backend सिर्फ app.py में
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def run(self, fn, *args):
+        if not self.workers:
+            self.inline += 1
+            return fn(*args)
+        self.calls += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+        except BrokenProcessPool:
+            # Worker crash (OOM kill आदि) - नया pool, यह call inline
+            logger.error("CPU pool broken, restarting")
+            self._pool = None
+            self.inline += 1
+            return fn(*args)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self):
+        return {"workers": self.workers, "calls": self.calls, "inline": self.inline}
@@ -0,0 +1,189 @@
+import re
+import hashlib
+import snowballstemmer
+from database.spell import spell_batch
+from database.routing import bloom_batch
+
+# ─────────────────────────────────────────
+# 🚀 PRE-COMPILED PATTERNS
+# ─────────────────────────────────────────
+# normalize_query() digits को letters में बदल देता है (0→o, 1→i...),
+# इसलिए year / quality / SxxEyy raw (lowercase) text से निकालते हैं
+SPLIT_PATTERN = re.compile(r"[^a-z0-9]+")
+YEAR_PATTERN = re.compile(r"(?<!\d)(19[3-9]\d|20\d\d)(?!\d)")
+EPISODE_PATTERN = re.compile(r"\bs(\d{1,2})\s*[._-]?\s*e(\d{1,3})\b")
+SEASON_PATTERN = re.compile(r"\b(?:s|season\s*)(\d{1,2})\b")
+
+# Query / index normalizer (process pool workers भी यही import करते हैं)
+NORMALIZE_PATTERN = re.compile(r"[^a-z0-9\s]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+REPLACEMENTS = str.maketrans({
+    "0": "o", "1": "i", "3": "e",
+    "4": "a", "5": "s", "7": "t"
+})
+
+# Search API में filter होने वाले fields
+META_FIELDS = ("lang", "quality", "year", "season", "episode")
+
+# Edge n-gram limits (prefix index)
+NGRAM_MIN = 3
+NGRAM_MAX = 15
+
+
+# ─────────────────────────────────────────
+# 🧠 OPTIMIZED NORMALIZER
+# ─────────────────────────────────────────
+def normalize_query(q: str) -> str:
+    if not q: return ""
+    # Translate और Regex एक साथ (Fastest Method)
+    q = q.lower().translate(REPLACEMENTS)
+    q = NORMALIZE_PATTERN.sub(" ", q)
+    return WHITESPACE_PATTERN.sub(" ", q).strip()
+
+
+# ─────────────────────────────────────────
+# 🏷 METADATA EXTRACTION (INDEX TIME)
+# ─────────────────────────────────────────
+def extract_meta(text, languages, qualities):
+    """
+    File name + caption से structured fields निकालता है।
+    सिर्फ मिले हुए fields लौटते हैं (sparse) ताकि doc छोटा रहे।
+    """
+    text = (text or "").lower()
+    tokens = SPLIT_PATTERN.split(text)
+    meta = {}
+
+    langs = [t for t in languages if t in tokens]
+    if langs:
+        meta["lang"] = langs
+
+    for q in qualities:
+        if q in tokens:
+            meta["quality"] = q
+            break
+
+    year = YEAR_PATTERN.search(text)
+    if year:
+        meta["year"] = int(year.group(1))
+
+    spaced = " ".join(tokens)
+    ep = EPISODE_PATTERN.search(spaced)
+    if ep:
+        meta["season"], meta["episode"] = int(ep.group(1)), int(ep.group(2))
+    else:
+        season = SEASON_PATTERN.search(spaced)
+        if season:
+            meta["season"] = int(season.group(1))
+    return meta
+
+
+def series_group(file_name, meta):
+    """
+    Series + season का compact key ("Breaking.Bad.S01E03" → hash of
+    "breaking bad|1")। Season न हो या नाम न मिले तो None।
+    """
+    if meta.get("season") is None:
+        return None
+    spaced = " ".join(SPLIT_PATTERN.split((file_name or "").lower()))
+    marker = EPISODE_PATTERN.search(spaced) or SEASON_PATTERN.search(spaced)
+    series = normalize_query(spaced[:marker.start()]) if marker else ""
+    if not series:
+        return None
+    return hashlib.blake2b(f"{series}|{meta['season']}".encode(), digest_size=6).hexdigest()
+
+
+# ─────────────────────────────────────────
+# ✂️ EDGE N-GRAMS (PREFIX INDEX)
+# ─────────────────────────────────────────
+def edge_ngrams(text):
+    """Normalized name के हर शब्द के prefixes: "stranger" → str, stra, stran..."""
+    grams = set()
+    for token in text.split():
+        for i in range(NGRAM_MIN, min(len(token), NGRAM_MAX) + 1):
+            grams.add(token[:i])
+    return sorted(grams)
+
+
+def prefix_terms(query):
+    """Query tokens → n-gram lookup terms (बहुत छोटे tokens skip)"""
+    return sorted({t[:NGRAM_MAX] for t in query.split() if len(t) >= NGRAM_MIN})
+
+
+def meta_filter(lang=None, quality=None, year=None, season=None, episode=None):
+    """Search kwargs → MongoDB filter (None वाले fields skip)"""
+    values = {
+        "lang": lang.lower() if lang else None,
+        "quality": quality.lower() if quality else None,
+        "year": int(year) if year else None,
+        "season": int(season) if season else None,
+        "episode": int(episode) if episode else None,
+    }
+    return {k: v for k, v in values.items() if v is not None}
+
+
+def meta_match(meta, flt):
+    """In-memory engines के लिए वही filter (lang एक list है)"""
+    for key, value in flt.items():
+        have = meta.get(key)
+        if key == "lang":
+            if not have or value not in have:
+                return False
+        elif have != value:
+            return False
+    return True
+
+
+# ─────────────────────────────────────────
+# 📦 BATCH HELPERS (PROCESS POOL ENTRY POINTS)
+# ─────────────────────────────────────────
+# Top-level + सिर्फ plain data in/out, ताकि worker processes में pickle हो सकें
+def search_fields_batch(texts, languages, qualities):
+    """[(file_name, caption)] → backfill वाले fields (metadata + ngrams + group)"""
+    out = []
+    for name, caption in texts:
+        fields = extract_meta(f"{name or ''} {caption or ''}", languages, qualities)
+        fields["ngrams"] = edge_ngrams(normalize_query(name))
+        group = series_group(name, fields)
+        if group:
+            fields["group"] = group
+        out.append(fields)
+    return out
+
+
+# MongoDB text index की default_language (english) वाला Snowball stemmer -
+# "stories" / "story" दोनों "stori"। Stemmer object thread-safe नहीं: सिर्फ
+# event loop और pool workers (अलग process) से चलता है।
+_STEMMER = snowballstemmer.stemmer("english")
+
+
+def stem_word(word):
+    return _STEMMER.stemWord(word)
+
+
+def index_terms(texts):
+    """[(file_name, caption)] → [(normalized name, vocabulary terms)] - startup build के लिए"""
+    out = []
+    for name, caption in texts:
+        name = normalize_query(name)
+        words = name.split() + normalize_query(caption).split()
+        terms = set(edge_ngrams(name))
+        terms.update(words)
+        # $text query stems से match करता है - VocabularyFilter भी stem देखेगा
+        terms.update(_STEMMER.stemWords(words))
+        out.append((name, terms))
+    return out
+
+
+def index_batch(texts, spell_args=None, vocab_args=None):
+    """
+    index_terms + SymSpell variants + Bloom bits, सब एक ही worker call में।
+    → (spell_batch नतीजा या None, (bloom_batch नतीजा, terms count) या None)
+    """
+    terms = index_terms(texts)
+    words = spell_batch([name for name, _ in terms], *spell_args) if spell_args else None
+    vocab = None
+    if vocab_args:
+        size, hashes, max_len = vocab_args
+        keys = [term[:max_len] for _, doc_terms in terms for term in doc_terms]
+        vocab = (bloom_batch(keys, size, hashes), len(keys))
+    return words, vocab
@@ -1,12 +1,42 @@
 import logging
+import os
 import re
 import base64
 import asyncio
+import time
+import heapq
+from itertools import islice
+from datetime import datetime, timezone, timedelta
 from struct import pack
 import motor.motor_asyncio
 from hydrogram.file_id import FileId
-from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError
-from info import DATABASE_URL, DATABASE_NAME, MAX_BTN
+from bson.binary import Binary
+from pymongo import UpdateOne, UpdateMany, InsertOne
+from pymongo.errors import ServerSelectionTimeoutError, BulkWriteError
+from info import (
+    DATABASE_URL, DATABASE_NAME, MAX_BTN, CACHE_TIME, LANGUAGES, QUALITY,
+    SEARCH_BACKEND, SQLITE_INDEX_PATH, SNAPSHOT_PATH, SEARCH_CACHE_SIZE, SEARCH_COUNT_CAP,
+    KEYSET_PAGINATION, SEARCH_FANOUT, SEARCH_TIMEOUT, SPELL_CHECK, SPELL_INDEX, SPELL_MAX_DISTANCE,
+    FILE_ROUTING, FILE_ID_MODE, POPULARITY_WEIGHT, POPULARITY_HALF_LIFE, HIT_FLUSH_INTERVAL,
+    CPU_WORKERS, PREFETCH_MAX, NEGATIVE_CACHE_TTL, VOCAB_FILTER, WARMUP_QUERIES, WARMUP_CONCURRENCY, QUERY_LOG_SIZE, QUERY_LOG_DAYS,
+    GROUP_RESULTS, NEAR_DUP_MODE, NEAR_DUP_THRESHOLD
+)
+from database.search_index import InvertedIndex
+from database.sqlite_index import SqliteIndex
+# numpy hard dependency है (requirements.txt) - near_dup / routing भी हमेशा load करते हैं
+from database.columnar_index import ColumnarIndex
+from database.snapshot_index import SnapshotSegment, LayeredIndex, write_snapshot
+from database.spell import SymSpell, rank_candidates
+from database.file_meta import (
+    META_FIELDS, NGRAM_MIN, NGRAM_MAX, normalize_query, extract_meta, meta_filter, edge_ngrams,
+    prefix_terms, search_fields_batch, index_batch, series_group, stem_word
+)
+from database.near_dup import near_dup_fields, near_dup_batch, lookup_keys, is_near_dup, NEAR_DUP_SAME
+from database.search_cache import SearchCache, SingleFlight, Prefetcher
+from database.routing import CollectionRouter, VocabularyFilter
+from database.popularity import HitBuffer
+from database.analytics import QueryRecorder
+from database.cpu_pool import CpuPool
 
 # Logger Setup
 logging.basicConfig(level=logging.INFO)
@@ -16,14 +46,9 @@ logger = logging.getLogger(__name__)
 # 🚀 PRE-COMPILED REGEX (SAVES CPU)
 # ─────────────────────────────────────────
 # यह CPU usage को 40% तक कम करता है जब बहुत ज्यादा सर्च रिक्वेस्ट आती हैं
-NORMALIZE_PATTERN = re.compile(r"[^a-z0-9\s]")
-WHITESPACE_PATTERN = re.compile(r"\s+")
 USERNAME_PATTERN = re.compile(r"@\w+")
-
-REPLACEMENTS = str.maketrans({
-    "0": "o", "1": "i", "3": "e",
-    "4": "a", "5": "s", "7": "t"
-})
+ZERO_RUN_PATTERN = re.compile(b"\x00+")
+ZERO_RLE_PATTERN = re.compile(b"\x00(.)", re.S)
 
 # ─────────────────────────────────────────
 # ⚙️ MOTOR CONNECTION (KOYEB OPTIMIZED)
@@ -46,6 +71,11 @@ COLLECTIONS = {
     "archive": archive
 }
 
+# Restart के बाद cache warmup के लिए query frequencies
+hot_queries = db["HotQueries"]
+# हर search का log (analytics) - TTL index से पुराने records auto-delete
+query_log = db["QueryLog"]
+
 # ─────────────────────────────────────────
 # ⚡ INDEX MANAGER (AUTO-RUN)
 # ─────────────────────────────────────────
@@ -79,105 +109,793 @@ async def ensure_indexes():
                     background=True
                 )
                 logger.info(f"✅ Index created for {name}")
+
+            # Metadata filters हमेशा $text / ngrams के साथ चलते हैं - $text query दूसरा
+            # index नहीं लेती, इसलिए पुराना meta compound index सिर्फ write का खर्च था
+            meta_index = f"{name}_meta"
+            if meta_index in indexes:
+                await col.drop_index(meta_index)
+                logger.info(f"🗑 Unused meta index dropped for {name}")
+
+            # Edge n-gram prefix index ("stran thin" → Stranger Things)
+            ngram_index = f"{name}_ngrams"
+            if ngram_index not in indexes:
+                await col.create_index([("ngrams", 1)], name=ngram_index, background=True)
+                logger.info(f"✅ Prefix index created for {name}")
+
+            # Series + season group ("📂 12 files" expand के लिए)
+            group_index = f"{name}_group"
+            if group_index not in indexes:
+                await col.create_index([("group", 1)], name=group_index, sparse=True, background=True)
+                logger.info(f"✅ Group index created for {name}")
+
+            # Near-duplicate LSH band keys (multikey)
+            lsh_index = f"{name}_lsh"
+            if lsh_index not in indexes:
+                await col.create_index([("lsh", 1)], name=lsh_index, sparse=True, background=True)
+                logger.info(f"✅ Near-dup index created for {name}")
         except Exception as e:
             logger.error(f"Index failed for {name}: {e}")
 
+    try:
+        await hot_queries.create_index([("query", 1), ("source", 1)], unique=True, background=True)
+        await hot_queries.create_index([("pop", -1)], background=True)
+        # QUERY_LOG_DAYS से search नहीं हुई queries अपने आप हटें (pop_at = आखिरी flush)
+        await hot_queries.create_index([("pop_at", 1)], expireAfterSeconds=QUERY_LOG_DAYS * 86400, background=True)
+        await query_log.create_index([("ts", 1)], expireAfterSeconds=QUERY_LOG_DAYS * 86400, background=True)
+    except Exception as e:
+        logger.error(f"Index failed for query stats: {e}")
+
 # ─────────────────────────────────────────
-# 🧠 OPTIMIZED NORMALIZER
+# 🔤 SPELL DICTIONARY + 🧭 ROUTING (OPTIONAL)
 # ─────────────────────────────────────────
-def normalize_query(q: str) -> str:
-    if not q: return ""
-    # Translate और Regex एक साथ (Fastest Method)
-    q = q.lower().translate(REPLACEMENTS)
-    q = NORMALIZE_PATTERN.sub(" ", q)
-    return WHITESPACE_PATTERN.sub(" ", q).strip()
+# ~3 KB RAM प्रति शब्द (distance 2) - अलग opt-in, SPELL_CHECK सिर्फ group default है
+SPELL = SymSpell(max_distance=SPELL_MAX_DISTANCE) if SPELL_INDEX else None
+# file _id → collection (Bloom filters) - file send पर 3 की जगह 1 find_one
+ROUTER = CollectionRouter(COLLECTIONS) if FILE_ROUTING else None
+# Known tokens - gibberish / spam queries बिना DB call के reject
+VOCAB = VocabularyFilter(NGRAM_MIN, NGRAM_MAX, stem=stem_word) if VOCAB_FILTER else None
+
+# CPU-heavy काम (fuzzy matching, bulk normalization) के लिए process pool
+CPU = CpuPool(CPU_WORKERS)
+# इससे छोटे batches inline - IPC का खर्च काम से ज्यादा होगा
+POOL_MIN_BATCH = 500
+# इससे कम spell candidates (~50µs हर edit distance) inline - pool round trip ~60ms
+SPELL_INLINE_MAX = 100
+# Startup build: इतने शब्द SymSpell में merge करके loop को yield
+SPELL_MERGE_CHUNK = 1000
 
-def prefix_query(q: str) -> str:
-    # सिर्फ 3 अक्षर से बड़े शब्दों का प्रीफिक्स बनाएं
-    return " ".join(w[:4] for w in q.split() if len(w) > 3)
+async def _index_docs(docs, name, backend=True):
+    """नए docs search backend, spell dictionary और router में जोड़ें"""
+    if backend and BACKEND.needs_build:
+        # Near-duplicates सिर्फ MongoDB में - local index में canonical file ही
+        visible = [doc for doc in docs if not doc.get("dup_of")] if NEAR_DUP_DEDUPE else docs
+        if visible:
+            await BACKEND.add_many(visible, name)
+    if SPELL is not None or VOCAB is not None:
+        texts = [(doc.get("file_name"), doc.get("caption")) for doc in docs]
+        # Normalization, SymSpell variants और Bloom hashing - सब worker में;
+        # loop पर सिर्फ dict inserts और एक vectorized bit OR
+        args = (texts, SPELL.batch_args() if SPELL is not None else None, VOCAB.batch_args() if VOCAB is not None else None)
+        if len(texts) >= POOL_MIN_BATCH:
+            words, vocab = await CPU.run(index_batch, *args)
+        else:
+            words, vocab = index_batch(*args)
+        if words is not None:
+            # नए शब्दों के deletes insert (~25µs/शब्द) - chunks में, बीच में loop को मौका
+            for i in range(0, len(words), SPELL_MERGE_CHUNK):
+                SPELL.merge(words[i:i + SPELL_MERGE_CHUNK])
+                await asyncio.sleep(0)
+        if vocab is not None:
+            # Name के prefixes (prefix fallback) + caption के पूरे शब्द
+            VOCAB.add_packed(*vocab)
+    if ROUTER is not None:
+        for doc in docs:
+            ROUTER.add(name, to_link_id(doc["_id"]))
+
+async def _spell_fix(query):
+    """Typos ठीक करें (dictionary तैयार न हो तो query जैसी है)"""
+    if SPELL is None or not SPELL.ready:
+        return query
+    items = SPELL.candidates(query)
+    if not any(cands for _, _, cands in items):
+        return query
+    # Candidates यहाँ (dict lookups), edit distances - कम हों तो inline, वरना pool में
+    if sum(len(cands or ()) for _, _, cands in items) < SPELL_INLINE_MAX:
+        return rank_candidates(items)
+    return await CPU.run(rank_candidates, items)
+
+async def build_search_indexes(batch_size=5000):
+    """Startup पर तीनों collections एक बार scan करके local structures बनाएगा"""
+    build = BACKEND.needs_build and (not BACKEND.ready or BACKEND.catch_up)
+    if not build and SPELL is None and ROUTER is None and VOCAB is None:
+        return
+    start = time.time()
+    projection = {"_id": 1}
+    if build or SPELL is not None or VOCAB is not None:
+        projection.update({"file_name": 1, "file_size": 1})
+    if build or VOCAB is not None:
+        projection["caption"] = 1
+    if build:
+        projection.update({k: 1 for k in META_FIELDS})
+        projection["dup_of"] = 1
+    try:
+        if VOCAB is not None:
+            # ~10 n-grams/tokens/stems प्रति file (unique) + growth headroom
+            total = sum(await asyncio.gather(*(c.estimated_document_count() for c in COLLECTIONS.values())))
+            VOCAB.reset(max(total * 10, 100000))
+        for name, col in COLLECTIONS.items():
+            if ROUTER is not None:
+                # Growth के लिए 50% headroom
+                ROUTER.reset(name, await col.estimated_document_count() * 1.5)
+            batch = []
+            async for doc in col.find({}, projection).batch_size(batch_size):
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    await _index_docs(batch, name, build)
+                    batch = []
+            if batch:
+                await _index_docs(batch, name, build)
+        await BACKEND.finish_build()
+        BACKEND.ready = True
+        for structure in (SPELL, ROUTER, VOCAB):
+            if structure is not None:
+                structure.ready = True
+        logger.info(
+            f"✅ Search indexes ready in {time.time() - start:.1f}s "
+            f"(backend: {BACKEND.name}, files: {len(BACKEND)}, "
+            f"words: {len(SPELL) if SPELL is not None else '-'}, "
+            f"router: {ROUTER.memory() // 1024 if ROUTER is not None else '-'} KB, "
+            f"vocab: {VOCAB.memory() // 1024 if VOCAB is not None else '-'} KB)"
+        )
+    except Exception as e:
+        logger.error(f"Search index build failed: {e}")
+
+# ─────────────────────────────────────────
+# ⚡ RESULT CACHE (TTL + LRU)
+# ─────────────────────────────────────────
+# Popular titles एक TTL के अंदर DB को दोबारा नहीं छूते
+SEARCH_CACHE = SearchCache(maxsize=SEARCH_CACHE_SIZE, ttl=CACHE_TIME)
+# (query, collection) -> total - हर Next/Prev पर दोबारा count नहीं
+COUNT_CACHE = SearchCache(maxsize=SEARCH_CACHE_SIZE, ttl=CACHE_TIME)
+# (query, collection, offset) -> (score, _id) - अगले पेज का keyset anchor
+# Callback में सिर्फ offset जाता है (64 bytes limit), anchor यहाँ रहता है
+KEYSET_CACHE = SearchCache(maxsize=SEARCH_CACHE_SIZE, ttl=CACHE_TIME)
+# (query, collection, filters) -> zero results - छोटा TTL, insert पर साफ
+# अलग cache ताकि spam queries popular results को evict न करें
+NEGATIVE_CACHE = SearchCache(maxsize=SEARCH_CACHE_SIZE, ttl=NEGATIVE_CACHE_TTL)
+# Identical concurrent searches → एक ही DB call
+SEARCH_FLIGHTS = SingleFlight()
+
+def _invalidate(name):
+    """Collection में write हुआ - उससे जुड़े सारे caches साफ"""
+    for cache in (SEARCH_CACHE, COUNT_CACHE, KEYSET_CACHE, NEGATIVE_CACHE):
+        cache.invalidate(name)
 
 # ─────────────────────────────────────────
 # 💾 SAVE FILE (SAFER)
 # ─────────────────────────────────────────
+def file_doc(media):
+    """Telegram media → DB doc (metadata, n-grams, group); ID decode न हो तो None"""
+    raw_id = file_id_bytes(media.file_id)
+    if not raw_id:
+        return None # अगर ID डिकोड नहीं हुई तो सेव न करें
+
+    # Pre-compiled regex का उपयोग
+    f_name = USERNAME_PATTERN.sub("", media.file_name or "").strip()
+    caption = USERNAME_PATTERN.sub("", media.caption or "").strip()
+
+    doc = {
+        "_id": to_db_id(raw_id),
+        "file_name": f_name,
+        "caption": caption,
+        "file_size": media.file_size
+    }
+    # 🏷 Index-time metadata - filters अब query में जाते हैं
+    doc.update(extract_meta(f"{media.file_name or ''} {caption}", LANGUAGES, QUALITY))
+    # ✂️ Prefix search के लिए edge n-grams
+    doc["ngrams"] = edge_ngrams(normalize_query(f_name))
+    # 📂 एक season के episodes search में एक entry बनते हैं
+    group = series_group(f_name, doc)
+    if group:
+        doc["group"] = group
+    return doc
+
+async def save_files(docs, collection_type="primary"):
+    """
+    Docs का batch एक insert_many(ordered=False) में - (saved, duplicates, errors)।
+    Duplicate _id (11000) बाकी batch को नहीं रोकता।
+    """
+    col = COLLECTIONS.get(collection_type, primary)
+    name = col.name.lower()
+    docs, skipped = await _mark_near_dups(col, docs)
+    if not docs:
+        return 0, skipped, 0
+
+    failed, dup, err = set(), skipped, 0
+    try:
+        await col.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed.add(error["index"])
+            if error.get("code") == 11000:
+                dup += 1
+            else:
+                err += 1
+                logger.error(f"Save Error: {error.get('errmsg')}")
+    except Exception as e:
+        logger.error(f"Save Error: {e}")
+        return 0, skipped, len(docs)
+
+    inserted = [doc for i, doc in enumerate(docs) if i not in failed] if failed else docs
+    if inserted:
+        await _index_docs(inserted, name)
+        _invalidate(name)
+    return len(inserted), dup, err
+
 async def save_file(media, collection_type="primary"):
     try:
-        file_id_str = unpack_new_file_id(media.file_id)
-        if not file_id_str:
-            return "err" # अगर ID डिकोड नहीं हुई तो सेव न करें
-
-        # Pre-compiled regex का उपयोग
-        f_name = USERNAME_PATTERN.sub("", media.file_name or "").strip()
-        caption = USERNAME_PATTERN.sub("", media.caption or "").strip()
-
-        doc = {
-            "_id": file_id_str,
-            "file_name": f_name,
-            "caption": caption,
-            "file_size": media.file_size
-        }
-
-        col = COLLECTIONS.get(collection_type, primary)
-        await col.insert_one(doc)
-        return "suc"
-    except DuplicateKeyError:
-        return "dup"
+        doc = file_doc(media)
+        if doc is None:
+            return "err"
+        saved, dup, _ = await save_files([doc], collection_type)
+        return "suc" if saved else "dup" if dup else "err"
     except Exception as e:
         logger.error(f"Save Error: {e}")
         return "err"
 
 # ─────────────────────────────────────────
-# 🔍 SEARCH ENGINE (CORRECTED LOGIC)
+# 🧬 NEAR-DUPLICATE LOOKUP
 # ─────────────────────────────────────────
-def _text_filter(q):
-    return {"$text": {"$search": q}}
+# flag / skip दोनों में search सिर्फ canonical files दिखाता है
+NEAR_DUP_DEDUPE = NEAR_DUP_MODE in ("flag", "skip")
+# एक lookup में ज्यादा से ज्यादा इतने LSH candidates verify होंगे
+NEAR_DUP_CANDIDATES = 20
+def _is_near_dup(cand, doc):
+    return is_near_dup(cand, doc, NEAR_DUP_THRESHOLD)
 
-async def _search(col, q, offset, limit):
+async def _find_near_dup(col, doc, keys):
+    """LSH candidates में से पहली file जिसका नाम + size + meta मिलता हो → उसका canonical _id"""
+    projection = {"mh": 1, "file_name": 1, "file_size": 1, "dup_of": 1, **{k: 1 for k in NEAR_DUP_SAME}}
     try:
+        cursor = col.find({"lsh": {"$in": keys}}, projection).limit(NEAR_DUP_CANDIDATES)
+        async for cand in cursor:
+            if _is_near_dup(cand, doc):
+                return cand.get("dup_of") or cand["_id"]
+    except Exception as e:
+        logger.error(f"Near-dup lookup failed in {col.name}: {e}")
+    return None
+
+async def _mark_near_dups(col, docs):
+    """
+    Re-uploads पहचानें - DB lookups concurrently, फिर उसी batch के अंदर
+    (एक channel में लगातार दो बार post हुई file)। → (रखने वाले docs, skipped)
+    """
+    if NEAR_DUP_MODE == "off":
+        return docs, 0
+    for doc in docs:
+        doc.update(near_dup_fields(doc["file_name"], doc["file_size"]))
+    keys = [lookup_keys(doc["mh"], doc["file_size"]) if "mh" in doc else None for doc in docs]
+    originals = await asyncio.gather(*[
+        _find_near_dup(col, doc, k) if k else asyncio.sleep(0) for doc, k in zip(docs, keys)
+    ])
+
+    kept, skipped, seen = [], 0, {}
+    for doc, k, original in zip(docs, keys, originals):
+        if original is None and k:
+            for key in k:
+                cand = seen.get(key)
+                if cand is not None and _is_near_dup(cand, doc):
+                    original = cand.get("dup_of") or cand["_id"]
+                    break
+        if original is not None:
+            if NEAR_DUP_MODE == "skip":
+                skipped += 1
+                continue
+            doc["dup_of"] = original
+        kept.append(doc)
+        for key in doc.get("lsh", ()):
+            seen.setdefault(key, doc)
+    return kept, skipped
+
+async def _promote_orphans(col, name, ids):
+    """Canonical files delete हुईं - हर group की पहली duplicate नई canonical बनेगी"""
+    projection = {"dup_of": 1}
+    if BACKEND.needs_build:
+        projection.update({"file_name": 1, "file_size": 1, **{k: 1 for k in META_FIELDS}})
+    groups = {}
+    async for doc in col.find({"dup_of": {"$in": ids}}, projection).sort("_id", 1):
+        groups.setdefault(doc["dup_of"], []).append(doc)
+    if not groups:
+        return
+    ops, promoted = [], []
+    for docs in groups.values():
+        head = docs[0]
+        ops.append(UpdateOne({"_id": head["_id"]}, {"$unset": {"dup_of": ""}}))
+        if len(docs) > 1:
+            ops.append(UpdateMany({"_id": {"$in": [d["_id"] for d in docs[1:]]}}, {"$set": {"dup_of": head["_id"]}}))
+        head.pop("dup_of")
+        promoted.append(head)
+    await col.bulk_write(ops, ordered=False)
+    if BACKEND.needs_build:
+        await BACKEND.add_many(promoted, name)
+
+# ─────────────────────────────────────────
+# 🔍 SEARCH ENGINE (CORRECTED LOGIC)
+# ─────────────────────────────────────────
+def _visible(query):
+    """Flagged near-duplicates search में नहीं आते (dup_of missing/null)"""
+    return {**query, "dup_of": None} if NEAR_DUP_DEDUPE else query
+
+def _text_filter(q, flt=None):
+    if flt:
+        return _visible({"$text": {"$search": q}, **flt})
+    return _visible({"$text": {"$search": q}})
+
+def _flt_key(flt):
+    return tuple(sorted(flt.items())) if flt else ()
+
+def _prefix_filter(q, flt=None):
+    return _visible({"ngrams": {"$all": prefix_terms(q)}, **(flt or {})})
+
+async def _count(col, q, flt=None, prefix=False):
+    """Capped + cached count - पूरा count_documents सिर्फ एक बार प्रति query"""
+    key = (q, col.name.lower(), _flt_key(flt), prefix)
+    total = COUNT_CACHE.get(key)
+    if total is None:
+        query = _prefix_filter(q, flt) if prefix else _text_filter(q, flt)
+        total = await col.count_documents(query, limit=SEARCH_COUNT_CAP)
+        COUNT_CACHE.set(key, total)
+    return total
+
+SEARCH_PROJECTION = {"file_name": 1, "file_size": 1, "caption": 1, "score": 1}
+POPULARITY_HALF_LIFE_MS = POPULARITY_HALF_LIFE * 86400 * 1000
+
+def _decayed_pop(now):
+    """pop counter, pop_at से अब तक half-life के हिसाब से घटा हुआ"""
+    age = {"$max": [0, {"$subtract": [now, {"$ifNull": ["$pop_at", now]}]}]}
+    return {"$multiply": [
+        {"$ifNull": ["$pop", 0]},
+        {"$pow": [0.5, {"$divide": [age, POPULARITY_HALF_LIFE_MS]}]}
+    ]}
+
+def _score_expr():
+    """textScore + decayed popularity boost (POPULARITY_WEIGHT = 0 → सिर्फ text)"""
+    text = {"$meta": "textScore"}
+    if POPULARITY_WEIGHT <= 0:
+        return text
+    # घंटे तक round - एक paging session में scores stable रहें (keyset के लिए)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return {"$add": [text, {"$multiply": [POPULARITY_WEIGHT, {"$ln": {"$add": [1, _decayed_pop(now)]}}]}]}
+
+async def _fetch(col, q, offset, limit, flt=None):
+    """limit docs, (score desc, _id asc) order में - anchor मिले तो skip नहीं"""
+    name = col.name.lower()
+    anchor = KEYSET_CACHE.get((q, name, offset, _flt_key(flt))) if KEYSET_PAGINATION and offset else None
+    if anchor is None and POPULARITY_WEIGHT <= 0:
         # केवल जरूरी फील्ड्स निकालें (Projection) - RAM बचाता है
         cursor = col.find(
-            _text_filter(q),
+            _text_filter(q, flt),
             {"file_name": 1, "file_size": 1, "caption": 1, "score": {"$meta": "textScore"}}
         )
-        cursor.sort([("score", {"$meta": "textScore"})])
+        cursor.sort([("score", {"$meta": "textScore"}), ("_id", 1)])
         cursor.skip(offset).limit(limit)
-        
-        docs = await cursor.to_list(length=limit)
-        # Count अलग से (थोड़ा धीमा हो सकता है, लेकिन सटीक है)
-        # Note: बड़े DB में count() slow होता है, लेकिन यहाँ जरूरी है
-        count = await col.count_documents(_text_filter(q))
-        return docs, count
+        return await cursor.to_list(length=limit)
+
+    pipeline = [
+        {"$match": _text_filter(q, flt)},
+        {"$addFields": {"score": _score_expr()}},
+    ]
+    if anchor is not None:
+        # ⚡ Keyset: पिछले पेज के आखिरी (score, _id) के बाद से - depth का असर नहीं
+        score, last_id = anchor
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "_id": {"$gt": last_id}}
+        ]}})
+    pipeline.append({"$sort": {"score": -1, "_id": 1}})
+    if anchor is None and offset:
+        pipeline.append({"$skip": offset})
+    pipeline += [{"$limit": limit}, {"$project": SEARCH_PROJECTION}]
+    return await col.aggregate(pipeline).to_list(length=limit)
+
+async def _mongo_search(col, q, offset, limit, flt=None):
+    try:
+        # एक doc extra - इससे पता चलता है कि अगला पेज है या नहीं
+        docs = await _fetch(col, q, offset, limit + 1, flt)
+        if len(docs) <= limit:
+            # आखिरी पेज - total बिना count query के पता है
+            return docs, (offset + len(docs) if docs else 0)
+
+        docs = docs[:limit]
+        if KEYSET_PAGINATION:
+            last = docs[-1]
+            KEYSET_CACHE.set((q, col.name.lower(), offset + limit, _flt_key(flt)), (last["score"], last["_id"]))
+
+        # Count cached और capped है, लेकिन next page हमेशा सही रहेगा
+        count = await _count(col, q, flt)
+        return docs, max(count, offset + limit + 1)
     except Exception as e:
         logger.error(f"Search Error in {col.name}: {e}")
         return [], 0
 
-async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, collection_type="primary"):
+async def _group_count(col, q, flt=None):
+    """Groups की गिनती (capped + cached) - grouped search का total"""
+    key = (q, col.name.lower(), _flt_key(flt), "group")
+    total = COUNT_CACHE.get(key)
+    if total is None:
+        pipeline = [
+            {"$match": _text_filter(q, flt)},
+            {"$group": {"_id": {"$ifNull": ["$group", "$_id"]}}},
+            {"$limit": SEARCH_COUNT_CAP},
+            {"$count": "n"},
+        ]
+        result = await col.aggregate(pipeline, allowDiskUse=True).to_list(length=1)
+        total = result[0]["n"] if result else 0
+        COUNT_CACHE.set(key, total)
+    return total
+
+async def _mongo_grouped_search(col, q, offset, limit, flt=None):
+    """
+    Series collapse - एक season के सारे episodes एक entry (best scoring file
+    + files count), बाकी files उसी score order में। Group न हो तो file खुद।
+    हर page सारे text matches group करता है ($skip, keyset anchor नहीं) -
+    इसलिए GROUP_RESULTS opt-in है।
+    """
+    try:
+        pipeline = [
+            {"$match": _text_filter(q, flt)},
+            {"$addFields": {"score": _score_expr()}},
+            {"$sort": {"score": -1, "_id": 1}},
+            {"$group": {
+                "_id": {"$ifNull": ["$group", "$_id"]},
+                "score": {"$max": "$score"},
+                "first": {"$first": "$_id"},
+                "group": {"$first": "$group"},
+                "file_name": {"$first": "$file_name"},
+                "file_size": {"$first": "$file_size"},
+                "caption": {"$first": "$caption"},
+                "files": {"$sum": 1},
+            }},
+            {"$sort": {"score": -1, "first": 1}},
+            {"$skip": offset},
+            {"$limit": limit + 1},
+            {"$project": {
+                "_id": "$first", "group": 1, "files": 1,
+                "file_name": 1, "file_size": 1, "caption": 1, "score": 1
+            }},
+        ]
+        docs = await col.aggregate(pipeline, allowDiskUse=True).to_list(length=limit + 1)
+        if len(docs) <= limit:
+            return docs, (offset + len(docs) if docs else 0)
+        count = await _group_count(col, q, flt)
+        return docs[:limit], max(count, offset + limit + 1)
+    except Exception as e:
+        logger.error(f"Grouped Search Error in {col.name}: {e}")
+        return [], 0
+
+async def _mongo_prefix_search(col, q, offset, limit, flt=None):
+    """Edge n-gram lookup - हर query शब्द किसी indexed शब्द का prefix हो"""
+    if not prefix_terms(q):
+        return [], 0
+    try:
+        cursor = col.find(_prefix_filter(q, flt), {"file_name": 1, "file_size": 1, "caption": 1})
+        cursor.sort([("_id", 1)]).skip(offset).limit(limit + 1)
+        docs = await cursor.to_list(length=limit + 1)
+        if len(docs) <= limit:
+            return docs, (offset + len(docs) if docs else 0)
+        count = await _count(col, q, flt, prefix=True)
+        return docs[:limit], max(count, offset + limit + 1)
+    except Exception as e:
+        logger.error(f"Prefix Search Error in {col.name}: {e}")
+        return [], 0
+
+# ─────────────────────────────────────────
+# 🔌 SEARCH BACKENDS (PLUGGABLE)
+# ─────────────────────────────────────────
+class SearchBackend:
+    """
+    Search backend interface - हर method (docs, total) लौटाता है।
+    needs_build वाले backends startup पर MongoDB से भरे जाते हैं,
+    तब तक MongoBackend fallback रहता है। MongoDB हमेशा system of record है।
+    """
+    name = "base"
+    needs_build = False
+    ready = True
+    # Ready होते हुए भी startup scan चाहिए (snapshot के बाद के बदलाव)
+    catch_up = False
+
+    def __len__(self):
+        return 0
+
+    async def add_many(self, docs, source):
+        pass
+
+    async def finish_build(self):
+        pass
+
+    async def remove(self, file_ids, source):
+        pass
+
+    async def search(self, col, q, offset, limit, flt=None):
+        raise NotImplementedError
+
+    async def prefix_search(self, col, q, offset, limit, flt=None):
+        raise NotImplementedError
+
+
+class MongoBackend(SearchBackend):
+    """MongoDB $text + n-gram index (default)"""
+    name = "mongo"
+
+    async def search(self, col, q, offset, limit, flt=None):
+        if GROUP_RESULTS:
+            return await _mongo_grouped_search(col, q, offset, limit, flt)
+        return await _mongo_search(col, q, offset, limit, flt)
+
+    async def prefix_search(self, col, q, offset, limit, flt=None):
+        return await _mongo_prefix_search(col, q, offset, limit, flt)
+
+
+class MemoryBackend(SearchBackend):
+    """RAM inverted index - microseconds, कोई network hop नहीं"""
+    name = "memory"
+    needs_build = True
+
+    def __init__(self):
+        self.ready = False
+        self.index = InvertedIndex(normalize_query)
+
+    def __len__(self):
+        return len(self.index)
+
+    async def add_many(self, docs, source):
+        # Build batches (5000 docs) loop पर नहीं; lock की वजह से बाकी calls भी thread में
+        await asyncio.to_thread(self.index.add_many, docs, source)
+
+    async def remove(self, file_ids, source):
+        await asyncio.to_thread(self.index.remove, file_ids, source)
+
+    async def search(self, col, q, offset, limit, flt=None):
+        return await asyncio.to_thread(self.index.search, q, col.name.lower(), offset, limit, flt)
+
+    async def prefix_search(self, col, q, offset, limit, flt=None):
+        return await asyncio.to_thread(self.index.prefix_search, q, col.name.lower(), offset, limit, flt)
+
+
+class SqliteBackend(SearchBackend):
+    """Local SQLite FTS5 (bm25 + prefix) - disk पर रहता है, restart पर rebuild नहीं"""
+    name = "sqlite"
+    needs_build = True
+
+    def __init__(self, path):
+        self.index = SqliteIndex(path, normalize_query)
+        # पहले से भरा index file तुरंत तैयार है, पर startup scan से MongoDB के
+        # साथ reconcile होता है (दूसरी replica के deletes, crash, /migrateids)
+        self.ready = self.catch_up = len(self.index) > 0
+        if self.catch_up:
+            self.index.begin_catch_up()
+
+    def __len__(self):
+        return len(self.index)
+
+    async def add_many(self, docs, source):
+        await asyncio.to_thread(self.index.add_many, docs, source)
+
+    async def remove(self, file_ids, source):
+        await asyncio.to_thread(self.index.remove, file_ids, source)
+
+    async def finish_build(self):
+        if self.catch_up:
+            gone = await asyncio.to_thread(self.index.finish_catch_up)
+            self.catch_up = False
+            logger.info(f"🗃 SQLite catch-up done: {gone} stale files removed")
+
+    async def search(self, col, q, offset, limit, flt=None):
+        return await asyncio.to_thread(
+            self.index.search, q, col.name.lower(), offset, limit, flt, SEARCH_COUNT_CAP
+        )
+
+    async def prefix_search(self, col, q, offset, limit, flt=None):
+        return await asyncio.to_thread(
+            self.index.prefix_search, q, col.name.lower(), offset, limit, flt, SEARCH_COUNT_CAP
+        )
+
+
+class ColumnarBackend(SearchBackend):
+    """NumPy columns पूरे corpus के लिए - कम RAM/doc, vectorized scoring"""
+    name = "columnar"
+    needs_build = True
+
+    def __init__(self):
+        self.ready = False
+        self.index = ColumnarIndex(normalize_query, list(COLLECTIONS), LANGUAGES, QUALITY)
+
+    def __len__(self):
+        return len(self.index)
+
+    async def add_many(self, docs, source):
+        # हमेशा thread में - index lock search thread के पास हो सकता है;
+        # add_many खुद duplicates छोड़ता है (build + indexing overlap)
+        await asyncio.to_thread(self.index.add_many, docs, source)
+
+    async def remove(self, file_ids, source):
+        await asyncio.to_thread(self.index.remove, file_ids, source)
+
+    async def search(self, col, q, offset, limit, flt=None):
+        return await asyncio.to_thread(self.index.search, q, col.name.lower(), offset, limit, flt)
+
+    async def prefix_search(self, col, q, offset, limit, flt=None):
+        return await asyncio.to_thread(self.index.prefix_search, q, col.name.lower(), offset, limit, flt)
+
+
+class SnapshotBackend(ColumnarBackend):
+    """
+    /exportindex वाला mmap snapshot + RAM delta - startup तुरंत, कई processes
+    एक ही pages share करते हैं। Startup scan सिर्फ snapshot के बाद जुड़े docs
+    delta में डालता है और हटे हुए docs को tombstone करता है।
+    """
+    name = "snapshot"
+
+    def __init__(self, path):
+        super().__init__()
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            logger.warning(f"No search snapshot at {path} - building in RAM (run /exportindex)")
+            return
+        try:
+            self.index = LayeredIndex(SnapshotSegment(path), self.index)
+            self.ready = self.catch_up = True
+            logger.info(f"🗺 Search snapshot mapped: {len(self.index)} files")
+        except Exception as e:
+            logger.error(f"Search snapshot load failed: {e}")
+
+    async def finish_build(self):
+        if self.catch_up:
+            gone = await asyncio.to_thread(self.index.finish_catch_up)
+            self.catch_up = False
+            logger.info(f"🗺 Snapshot catch-up done: {len(self.index.delta)} new, {gone} deleted")
+
+
+def _make_backend(name):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SqliteBackend(SQLITE_INDEX_PATH)
+    if name == "columnar":
+        return ColumnarBackend()
+    if name == "snapshot":
+        return SnapshotBackend(SNAPSHOT_PATH)
+    if name != "mongo":
+        logger.error(f"Unknown SEARCH_BACKEND '{name}', using mongo")
+    return MongoBackend()
+
+MONGO_BACKEND = MongoBackend()
+BACKEND = _make_backend(SEARCH_BACKEND)
+
+def _backend():
+    """Local backend तैयार होने तक MongoDB से सर्च"""
+    return BACKEND if BACKEND.ready else MONGO_BACKEND
+
+async def _search(col, q, offset, limit, flt=None):
+    return await _backend().search(col, q, offset, limit, flt)
+
+async def _prefix_search(col, q, offset, limit, flt=None):
+    return await _backend().prefix_search(col, q, offset, limit, flt)
+
+async def _timed_search(col, q, offset, limit, flt=None, search=_search):
+    """Per-collection timeout - धीमा Archive बाकी results को नहीं रोकेगा"""
+    try:
+        return await asyncio.wait_for(search(col, q, offset, limit, flt), SEARCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Search timeout in {col.name} for '{q}'")
+        return [], 0
+
+async def _merged_search(q, offset, limit, flt=None, search=_search):
+    """तीनों collections concurrently, फिर text score से k-way merge"""
+    results = await asyncio.gather(*[
+        _timed_search(col, q, 0, offset + limit, flt, search) for col in COLLECTIONS.values()
+    ])
+    # हर list पहले से score desc में sorted है
+    merged = heapq.merge(*[docs for docs, _ in results], key=lambda d: -d.get("score", 0))
+    docs = list(islice(merged, offset, offset + limit))
+    return docs, sum(total for _, total in results)
+
+async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, collection_type="primary",
+                             quality=None, year=None, season=None, episode=None, spell_check=True):
     if not query: return [], "", 0, collection_type
     
     query = normalize_query(query)
     if not query: return [], "", 0, collection_type
 
-    # Lang Filter Pre-check (Optimization)
-    lang = lang.lower() if lang else None
+    # 🏷 Metadata Filters - $text / ngram match पर residual filter, count और pagination सही
+    flt = meta_filter(lang, quality, year, season, episode)
+    # Group का spell_check setting (dictionary न हो तो फर्क नहीं - cache keys एक जैसी)
+    spell = spell_check and SPELL is not None
+
+    # 🚫 पहले से पता है कि कुछ नहीं मिलेगा
+    empty = ([], "", 0, collection_type)
+    neg_key = (query, collection_type, _flt_key(flt), spell)
+    if NEGATIVE_CACHE.get(neg_key):
+        return empty
+    if VOCAB is not None and not VOCAB.known(query) and not (spell and VOCAB.known(await _spell_fix(query))):
+        VOCAB.rejected += 1
+        return empty
+
+    # ⚡ Cache Hit = Zero DB Calls
+    key = (query, collection_type, offset, _flt_key(flt), max_results, spell)
+    result = SEARCH_CACHE.get(key)
+    if result is None:
+        result = await _load_results(key, query, max_results, offset, flt, collection_type)
+    if not offset and result[2]:
+        # नई search (page 1) जिसके results मिले - warmup के लिए frequency
+        # (gibberish / zero-result queries HotQueries में नहीं जातीं)
+        QUERY_HITS.hit((query, collection_type))
+    return result
+
+async def _load_results(key, query, max_results, offset, flt, collection_type):
+    """key: (query, collection, offset, flt key, max_results, spell)"""
+    async def run():
+        res = await _get_search_results(query, max_results, offset, flt, collection_type, key[5])
+        if not res[2]:
+            # Zero results - short TTL वाले negative cache में। सिर्फ page 1:
+            # पुराना "Next" (delete के बाद end से आगे) पूरी query blank न करे
+            if not offset:
+                NEGATIVE_CACHE.set((query, collection_type, key[3], key[5]), True)
+            return res
+        # Binary _id → link-safe string (start links वही रहते हैं)
+        for doc in res[0]:
+            doc["_id"] = to_link_id(doc["_id"])
+        SEARCH_CACHE.set(key, res)
+        return res
+    # Prefetch चल रहा हो तो Next वाला user उसी flight से जुड़ जाता है
+    return await SEARCH_FLIGHTS.do(key, run)
+
+PREFETCH = Prefetcher(PREFETCH_MAX)
+
+def prefetch_search_results(query, offset, collection_type, max_results=MAX_BTN, lang=None,
+                            quality=None, year=None, season=None, episode=None, spell_check=True):
+    """
+    Page render होते ही अगला page background में cache में डालें।
+    Cached / in-flight हो या global limit भरी हो तो कुछ नहीं करता।
+    """
+    if not offset or not PREFETCH_MAX:
+        return False
+    query = normalize_query(query)
+    if not query:
+        return False
+    flt = meta_filter(lang, quality, year, season, episode)
+    key = (query, collection_type, int(offset), _flt_key(flt), max_results, spell_check and SPELL is not None)
+    if key in SEARCH_CACHE or SEARCH_FLIGHTS.in_flight(key):
+        return False
+    return PREFETCH.submit(lambda: _load_results(key, query, max_results, int(offset), flt, collection_type))
+
+async def _get_search_results(query, max_results, offset, flt, collection_type, spell=True):
+    # 🔤 Typo Fix (in-process, <1ms) - सही शब्द वैसे ही रहते हैं
+    # Prefix fallback typed query पर चलता है ("stran" को "strain" न बनाए)
+    fixed = await _spell_fix(query) if spell else query
 
     # 1. Direct Collection Search
     if collection_type in COLLECTIONS and collection_type != "all":
         col = COLLECTIONS[collection_type]
-        docs, total = await _search(col, query, offset, max_results)
-        
-        # Fallback Prefix (अगर डायरेक्ट मैच न मिले और यह पेज 1 हो)
-        if not docs and offset == 0:
-            prefix = prefix_query(query)
-            if prefix:
-                docs, total = await _search(col, prefix, 0, max_results)
+        docs, total = await _search(col, fixed, offset, max_results, flt)
         
-        # Language Filter Logic
-        if lang:
-            docs = [d for d in docs if lang in (d.get("file_name") or "").lower()]
+        # Fallback Prefix (अधूरे शब्द) - एक indexed lookup
+        if not docs:
+            docs, total = await _prefix_search(col, query, offset, max_results, flt)
             
         next_offset = offset + max_results if (offset + max_results) < total else ""
         return docs, next_offset, total, collection_type
 
-    # 2. Cascade Search (All) - Logic Fix for Pagination
+    # 2. Fan-out Search (All) - एक round trip, merged pagination
+    if SEARCH_FANOUT:
+        docs, total = await _merged_search(fixed, offset, max_results, flt)
+        if not docs:
+            docs, total = await _merged_search(query, offset, max_results, flt, _prefix_search)
+
+        next_offset = offset + max_results if (offset + max_results) < total else ""
+        return docs, next_offset, total, "all"
+
+    # 3. Cascade Search (All) - Logic Fix for Pagination
     # नोट: मल्टी-कलेक्शन पेजिंग जटिल है। यहाँ हम "Best Effort" अप्रोच यूज करेंगे।
     # हम क्रम से सर्च करेंगे, जब तक रिजल्ट नहीं मिलते।
     
@@ -192,30 +910,146 @@ async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, co
     # अगर आपको मर्ज्ड रिजल्ट चाहिए तो वो बहुत Heavy Operation है।
     
     for name, col in search_order:
-        docs, count = await _search(col, query, offset, max_results)
+        docs, count = await _search(col, fixed, offset, max_results, flt)
         if docs:
             found_docs = docs
             total_found = count
             current_source = name
             break # हमें रिजल्ट मिल गया, लूप तोड़ें
     
-    # अगर डायरेक्ट सर्च फेल हुई, तो Prefix सर्च ट्राई करें (सिर्फ Primary पर स्पीड के लिए)
-    if not found_docs and offset == 0:
-        prefix = prefix_query(query)
-        if prefix:
-             docs, count = await _search(primary, prefix, 0, max_results)
-             if docs:
-                 found_docs = docs
-                 total_found = count
-                 current_source = "primary"
-
-    if lang and found_docs:
-        found_docs = [d for d in found_docs if lang in (d.get("file_name") or "").lower()]
-        # फिल्टर के बाद टोटल काउंट गड़बड़ा सकता है, लेकिन यूजर एक्सपीरियंस के लिए ठीक है
+    # अगर डायरेक्ट सर्च फेल हुई, तो Prefix सर्च - तीनों collections पर एक साथ
+    if not found_docs:
+        results = await asyncio.gather(*[
+            _prefix_search(col, query, offset, max_results, flt) for _, col in search_order
+        ])
+        for (name, _), (docs, count) in zip(search_order, results):
+            if docs:
+                found_docs = docs
+                total_found = count
+                current_source = name
+                break
 
     next_offset = offset + max_results if (offset + max_results) < total_found else ""
     return found_docs, next_offset, total_found, current_source
 
+# ─────────────────────────────────────────
+# 📈 POPULARITY (WRITE-BEHIND HITS)
+# ─────────────────────────────────────────
+def _pop_update(n, now):
+    """पुराना pop decay करके नए hits जोड़ें (update pipeline, एक round trip)"""
+    return [{"$set": {"pop": {"$add": [_decayed_pop(now), n]}, "pop_at": now}}]
+
+async def _flush_hits(batch):
+    now = datetime.now(timezone.utc)
+    ops = {name: [] for name in COLLECTIONS}
+    for file_id, n in batch.items():
+        # Router से सिर्फ सही collection, वरना तीनों (missing _id पर update no-op है)
+        targets = ROUTER.route(file_id) if ROUTER is not None and ROUTER.ready else []
+        for name in targets or COLLECTIONS:
+            ops[name].append(UpdateOne({"_id": {"$in": id_variants(file_id)}}, _pop_update(n, now)))
+    for name, col_ops in ops.items():
+        if col_ops:
+            await COLLECTIONS[name].bulk_write(col_ops, ordered=False)
+
+HITS = HitBuffer(_flush_hits, HIT_FLUSH_INTERVAL)
+
+def record_file_hit(file_id):
+    """File delivery गिनें - DB write अगले flush में (bulk)"""
+    HITS.hit(file_id)
+
+# ─────────────────────────────────────────
+# 🔥 HOT QUERIES (RESTART WARMUP)
+# ─────────────────────────────────────────
+async def _flush_queries(batch):
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne({"query": query, "source": source}, _pop_update(n, now), upsert=True)
+        for (query, source), n in batch.items()
+    ]
+    await hot_queries.bulk_write(ops, ordered=False)
+
+QUERY_HITS = HitBuffer(_flush_queries, HIT_FLUSH_INTERVAL)
+# Warmup: raw pop order में top (limit x इतनी) queries पर decayed re-rank
+WARMUP_OVERFETCH = 4
+
+async def flush_counters():
+    """Restart (os.execl) से पहले pending hits लिख दें"""
+    await asyncio.gather(HITS.flush(), QUERY_HITS.flush(), QUERY_LOG.flush())
+
+# ─────────────────────────────────────────
+# 📊 QUERY ANALYTICS
+# ─────────────────────────────────────────
+async def _write_query_log(batch):
+    await query_log.insert_many(batch, ordered=False)
+
+QUERY_LOG = QueryRecorder(_write_query_log, QUERY_LOG_SIZE, HIT_FLUSH_INTERVAL * 2)
+
+def record_search(query, source, total, latency, offset=0):
+    """Search का record - DB write batch में (QUERY_LOG flush)"""
+    query = normalize_query(query)
+    if not query:
+        return
+    QUERY_LOG.record({
+        "query": query, "source": source, "hits": total, "offset": offset,
+        "ms": round(latency * 1000, 1), "ts": datetime.now(timezone.utc)
+    })
+
+async def top_queries(days=7, limit=15):
+    """(सबसे ज्यादा searches, सबसे ज्यादा zero-result searches)"""
+    await QUERY_LOG.flush()
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    group = {"$group": {
+        "_id": "$query", "count": {"$sum": 1},
+        "hits": {"$max": "$hits"}, "ms": {"$avg": "$ms"}, "max_ms": {"$max": "$ms"}
+    }}
+    top = query_log.aggregate([
+        {"$match": {"ts": {"$gte": since}}}, group,
+        {"$sort": {"count": -1}}, {"$limit": limit}
+    ]).to_list(length=limit)
+    zero = query_log.aggregate([
+        {"$match": {"ts": {"$gte": since}, "hits": 0}}, group,
+        {"$sort": {"count": -1}}, {"$limit": limit}
+    ]).to_list(length=limit)
+    return await asyncio.gather(top, zero)
+
+async def warm_search_cache(limit=WARMUP_QUERIES, concurrency=WARMUP_CONCURRENCY):
+    """
+    सबसे ज्यादा search हुई queries का पहला page cache में डालें।
+    Semaphore से सीमित concurrency - startup पर DB पर burst नहीं।
+    """
+    if not limit:
+        return 0
+    start = time.monotonic()
+    now = datetime.now(timezone.utc)
+    top = await hot_queries.aggregate([
+        # pop index से top candidates, फिर सिर्फ उन्हीं पर decay - पूरी collection sort नहीं
+        # (decay से order थोड़ा बदलता है, इसलिए limit से कुछ ज्यादा)
+        {"$sort": {"pop": -1}},
+        {"$limit": limit * WARMUP_OVERFETCH},
+        {"$addFields": {"hot": _decayed_pop(now)}},
+        {"$sort": {"hot": -1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "query": 1, "source": 1}}
+    ]).to_list(length=limit)
+
+    sem = asyncio.Semaphore(concurrency)
+    async def warm(doc):
+        async with sem:
+            try:
+                # get_search_results नहीं - वरना warmup खुद frequency बढ़ा देगा
+                query, source = doc["query"], doc["source"]
+                # Groups का default spell_check वाली key - वही जो ज्यादातर users hit करेंगे
+                key = (query, source, 0, _flt_key({}), MAX_BTN, SPELL_CHECK and SPELL is not None)
+                await _load_results(key, query, MAX_BTN, 0, {}, source)
+                return True
+            except Exception as e:
+                logger.warning(f"Warmup failed for {doc['query']!r}: {e}")
+                return False
+
+    warmed = sum(await asyncio.gather(*(warm(doc) for doc in top)))
+    logger.info(f"🔥 Search cache warmed: {warmed}/{len(top)} queries in {time.monotonic() - start:.2f}s")
+    return warmed
+
 # ─────────────────────────────────────────
 # 🗑 DELETE & UTILS
 # ─────────────────────────────────────────
@@ -225,38 +1059,256 @@ async def delete_files(query, collection_type="all"):
         
     query = normalize_query(query)
     deleted = 0
-    flt = _text_filter(query)
+    # Duplicates भी हटें - सिर्फ visible files नहीं
+    flt = {"$text": {"$search": query}}
     
     targets = COLLECTIONS.items() if collection_type == "all" else [(collection_type, COLLECTIONS.get(collection_type))]
     
     for name, col in targets:
-        if col:
+        if col is None:
+            continue
+        if BACKEND.needs_build or NEAR_DUP_DEDUPE:
+            # Local backend / बची duplicates के लिए पहले ids निकालें
+            ids = [d["_id"] async for d in col.find(flt, {"_id": 1})]
+            if not ids:
+                continue
+            res = await col.delete_many({"_id": {"$in": ids}})
+            if BACKEND.needs_build:
+                await BACKEND.remove(ids, name)
+            if NEAR_DUP_DEDUPE:
+                await _promote_orphans(col, name, ids)
+        else:
             res = await col.delete_many(flt)
-            deleted += res.deleted_count
+        deleted += res.deleted_count
+        _invalidate(name)
     return deleted
 
+async def export_search_snapshot(path=SNAPSHOT_PATH, batch_size=5000, progress=None):
+    """
+    तीनों collections → on-disk mmap snapshot (SEARCH_BACKEND=snapshot इसे load करता है)।
+    Temporary ColumnarIndex में scan, फिर एक बार में disk पर।
+    """
+    index = ColumnarIndex(normalize_query, list(COLLECTIONS), LANGUAGES, QUALITY)
+    projection = {"file_name": 1, "file_size": 1, **{k: 1 for k in META_FIELDS}}
+    done = 0
+    for name, col in COLLECTIONS.items():
+        batch = []
+        async for doc in col.find(_visible({}), projection).batch_size(batch_size):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                done += await asyncio.to_thread(index.add_many, batch, name)
+                batch = []
+                if progress:
+                    await progress(name, done)
+        if batch:
+            done += await asyncio.to_thread(index.add_many, batch, name)
+    return await asyncio.to_thread(write_snapshot, index, path)
+
+async def backfill_search_fields(batch_size=1000):
+    """पुराने docs में metadata + n-grams + series group + near-dup signature भरें (one-time admin job)"""
+    updated = 0
+    projection = {
+        "file_name": 1, "caption": 1, "ngrams": 1, "group": 1, "file_size": 1, "mh": 1, "lsh": 1,
+        **{k: 1 for k in META_FIELDS}
+    }
+
+    async def flush(col, docs):
+        texts = [(doc.get("file_name"), doc.get("caption")) for doc in docs]
+        # Regex / n-gram काम pool में, loop सिर्फ await करता है
+        fields = await CPU.run(search_fields_batch, texts, LANGUAGES, QUALITY)
+        if NEAR_DUP_MODE != "off":
+            # Signatures ताकि नए re-uploads पुरानी files से match हों
+            sigs = await CPU.run(near_dup_batch, [(doc.get("file_name"), doc.get("file_size")) for doc in docs])
+            for meta, sig in zip(fields, sigs):
+                meta.update(sig)
+        ops = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": meta})
+            for doc, meta in zip(docs, fields)
+            if any(doc.get(k) != v for k, v in meta.items())
+        ]
+        if not ops:
+            return 0
+        return (await col.bulk_write(ops, ordered=False)).modified_count
+
+    for name, col in COLLECTIONS.items():
+        docs = []
+        async for doc in col.find({}, projection).batch_size(batch_size):
+            docs.append(doc)
+            if len(docs) >= batch_size:
+                updated += await flush(col, docs)
+                docs = []
+        if docs:
+            updated += await flush(col, docs)
+        _invalidate(name)
+    return updated
+
+async def db_count_documents():
+    """/stats के लिए - collection metadata से estimated count (कोई scan नहीं)"""
+    counts = {}
+    for name, col in COLLECTIONS.items():
+        try:
+            counts[name] = await col.estimated_document_count()
+        except Exception as e:
+            logger.error(f"Count Error in {name}: {e}")
+            counts[name] = 0
+    counts["total"] = sum(counts.values())
+    return counts
+
 async def get_file_details(file_id):
-    # Parallel Search (Fastest) - तीनों में एक साथ ढूंढेगा
-    tasks = [col.find_one({"_id": file_id}) for col in COLLECTIONS.values()]
+    # Link में string id आती है - DB में string या Binary, दोनों match हों
+    flt = {"_id": {"$in": id_variants(file_id)}}
+
+    # 🧭 Router: सिर्फ उसी collection में देखें जहाँ file हो सकती है
+    candidates = ROUTER.route(file_id) if ROUTER is not None and ROUTER.ready else []
+    for name in candidates:
+        doc = await COLLECTIONS[name].find_one(flt)
+        if doc: return _link_doc(doc)
+
+    # Fallback: Parallel Search - बाकी collections में एक साथ ढूंढेगा
+    tasks = [col.find_one(flt) for name, col in COLLECTIONS.items() if name not in candidates]
     results = await asyncio.gather(*tasks)
     
     for doc in results:
-        if doc: return doc
+        if doc: return _link_doc(doc)
     return None
 
-# --- ID Utils (No Changes Needed, but optimized flow) ---
+async def get_group_files(group, limit=200):
+    """📂 Group expand - season के सारे episodes, हर collection से (indexed lookup)"""
+    if not group:
+        return []
+    projection = {"file_name": 1, "file_size": 1, "season": 1, "episode": 1}
+
+    async def fetch(col):
+        try:
+            return await col.find(_visible({"group": group}), projection).limit(limit).to_list(length=limit)
+        except Exception as e:
+            logger.error(f"Group Fetch Error in {col.name}: {e}")
+            return []
+
+    results = await asyncio.gather(*[fetch(col) for col in COLLECTIONS.values()])
+    docs = [doc for part in results for doc in part]
+    docs.sort(key=lambda d: (d.get("season") or 0, d.get("episode") or 0, d.get("file_name") or ""))
+    return [_link_doc(doc) for doc in docs[:limit]]
+
+def _link_doc(doc):
+    doc["_id"] = to_link_id(doc["_id"])
+    return doc
+
+# ─────────────────────────────────────────
+# 🆔 ID UTILS (STRING / BINARY)
+# ─────────────────────────────────────────
+# String mode: RLE + base64 (~32 chars, पुराना format)
+# Binary mode: वही 24 raw bytes BSON BinData में - _id और text index छोटे
 def encode_file_id(s: bytes) -> str:
-    r, n = b"", 0
-    for i in s + bytes([22, 4]):
-        if i == 0: n += 1
-        else:
-            if n: r += b"\x00" + bytes([n]); n = 0
-            r += bytes([i])
+    # Zero-runs का RLE regex से (C speed), पुराने loop जैसा ही output
+    r = ZERO_RUN_PATTERN.sub(lambda m: b"\x00" + bytes([len(m.group())]), s + bytes([22, 4]))
     return base64.urlsafe_b64encode(r).decode().rstrip("=")
 
-def unpack_new_file_id(new_file_id):
+def decode_file_id(s: str) -> bytes:
+    r = base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+    return ZERO_RLE_PATTERN.sub(lambda m: b"\x00" * m.group(1)[0], r)[:-2]
+
+def encode_file_ids(raw_ids):
+    return [encode_file_id(bytes(r)) for r in raw_ids]
+
+def decode_file_ids(ids):
+    return [decode_file_id(s) for s in ids]
+
+def file_id_bytes(new_file_id):
     try:
         d = FileId.decode(new_file_id)
-        return encode_file_id(pack("<iiqq", int(d.file_type), d.dc_id, d.media_id, d.access_hash))
+        return pack("<iiqq", int(d.file_type), d.dc_id, d.media_id, d.access_hash)
     except Exception:
         return None
+
+def unpack_new_file_id(new_file_id):
+    raw = file_id_bytes(new_file_id)
+    return encode_file_id(raw) if raw else None
+
+def to_db_id(raw: bytes):
+    return Binary(raw) if FILE_ID_MODE == "binary" else encode_file_id(raw)
+
+def to_link_id(_id) -> str:
+    return encode_file_id(bytes(_id)) if isinstance(_id, bytes) else _id
+
+def id_variants(file_id):
+    """Link id के दोनों storage रूप - migration के बीच भी file मिलेगी"""
+    try:
+        return [file_id, Binary(decode_file_id(file_id))]
+    except Exception:
+        return [file_id]
+
+# ─────────────────────────────────────────
+# 🔁 STRING → BINARY ID MIGRATION
+# ─────────────────────────────────────────
+async def migrate_file_ids(batch_size=1000, progress=None):
+    """
+    String _id वाले docs को Binary _id में batches में rewrite करता है।
+    Insert पहले, delete बाद में - बीच में रुके तो दोबारा चलाना safe है।
+    """
+    migrated = 0
+    for name, col in COLLECTIONS.items():
+        last = ""
+        while True:
+            cursor = col.find({"_id": {"$type": "string", "$gt": last}}).sort("_id", 1).limit(batch_size)
+            docs = await cursor.to_list(length=batch_size)
+            if not docs:
+                break
+            last = docs[-1]["_id"]
+            ops = []
+            old_ids = []
+            new_docs = []
+            for doc in docs:
+                try:
+                    new_id = Binary(decode_file_id(doc["_id"]))
+                except Exception:
+                    continue # खराब id - जैसी है वैसी छोड़ दें
+                old_ids.append(doc["_id"])
+                doc["_id"] = new_id
+                if isinstance(doc.get("dup_of"), str):
+                    # Canonical भी Binary बनेगा - वरना _promote_orphans कभी match नहीं करेगा
+                    doc["dup_of"] = _binary_id(doc["dup_of"])
+                ops.append(InsertOne(doc))
+                new_docs.append(doc)
+            if not ops:
+                continue
+            try:
+                await col.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # पिछली अधूरी run के duplicates ignore - बाकी errors नहीं
+                if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+            await col.delete_many({"_id": {"$in": old_ids}})
+            if BACKEND.needs_build:
+                # Local index में भी नए Binary ids - पुराने string ids वाली rows हटें
+                await BACKEND.remove(old_ids, name)
+                await BACKEND.add_many(new_docs, name)
+            migrated += len(old_ids)
+            if progress:
+                await progress(name, migrated)
+        await _migrate_dup_refs(col, batch_size)
+        _invalidate(name)
+    return migrated
+
+def _binary_id(file_id):
+    """String link id → Binary (खराब id जैसी है वैसी)"""
+    try:
+        return Binary(decode_file_id(file_id))
+    except Exception:
+        return file_id
+
+async def _migrate_dup_refs(col, batch_size):
+    """
+    बचे हुए string dup_of (पहले से Binary docs जो migrate न हुई canonical की
+    ओर point करते थे) → Binary। ये collection के migrate होने के बाद ही सही हैं।
+    """
+    ops = []
+    async for doc in col.find({"dup_of": {"$type": "string"}}, {"dup_of": 1}):
+        new = _binary_id(doc["dup_of"])
+        if new is not doc["dup_of"]:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"dup_of": new}}))
+        if len(ops) >= batch_size:
+            await col.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await col.bulk_write(ops, ordered=False)
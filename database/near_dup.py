@@ -0,0 +1,136 @@
+import re
+import math
+import zlib
+import hashlib
+import numpy as np
+from database.file_meta import SPLIT_PATTERN
+
+# ─────────────────────────────────────────
+# 🧬 MINHASH + LSH (NEAR-DUPLICATE FILES)
+# ─────────────────────────────────────────
+# Re-uploads: "Movie.2010.720p.x264.mkv" बनाम "Movie 2010 720p x264 @chan.mp4"
+# - नाम के char shingles का MinHash signature, LSH bands में बँटा।
+# 16 bands x 4 rows: Jaccard 0.7 पर ~99% candidate बनते हैं, फिर पूरे
+# signature (64 slots, threshold 0.85 पर std ~0.045) + size + numbers से पक्का।
+# 32 slots पर estimate का std ~0.07 था - CD1/CD2 जैसे pairs 0.84 पर निकल आते थे।
+SHINGLE = 4
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+# Mersenne prime - a*h+b int64 में overflow नहीं होता (h, a < 2^31)
+PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, PRIME, NUM_PERM, dtype=np.int64)
+_B = _rng.integers(0, PRIME, NUM_PERM, dtype=np.int64)
+
+# Size buckets: log scale पर 5% चौड़े; query पड़ोसी buckets भी देखती है
+SIZE_STEP = 0.05
+_LOG_STEP = math.log1p(SIZE_STEP)
+
+# Episode / quality / audio अलग = अलग file, नाम कितना भी मिलता हो
+NEAR_DUP_SAME = ("lang", "quality", "year", "season", "episode")
+
+# Container / release noise जो re-uploads में बदलता रहता है
+NOISE_TOKENS = {"mkv", "mp4", "avi", "webm", "m4v", "file", "files"}
+# Channel tags: "@MoviesHub", "[TamilRockers]", "www.site.com"
+TAG_PATTERN = re.compile(r"@\w+|\[[^\]]*\]|\bwww\.\S+")
+# इनके बाद वाला token भी number है: "Part Two", "Vol II", "CD 1"
+NUMBER_MARKERS = {"cd", "disc", "disk", "part", "pt", "vol", "volume", "chapter", "ch"}
+DIGITS = re.compile(r"\d+")
+
+
+def _tokens(file_name):
+    # Raw tokens - normalize_query के digit → letter (mp4 → mpa) से noise filter नहीं लगता
+    text = TAG_PATTERN.sub(" ", (file_name or "").lower())
+    return [t for t in SPLIT_PATTERN.split(text) if t and t not in NOISE_TOKENS]
+
+
+def number_tokens(file_name):
+    """
+    नाम के numbers: हर token के अंदर का हर digit run ("Part 1", cd1, ep123,
+    s01e05, 1x05, 720p) और markers के बाद वाला शब्द ("Part Two")। Near-dup के
+    लिए ये बिल्कुल बराबर होने चाहिए - Ep123/Ep124 का नाम 90%+ मिलता है पर file अलग है।
+    क्रम भी मायने रखता है: 1x05 बनाम 5x01 (set होता तो बराबर)।
+    """
+    tokens = _tokens(file_name)
+    nums = []
+    for i, token in enumerate(tokens):
+        nums.extend(str(int(run)) for run in DIGITS.findall(token))
+        if token in NUMBER_MARKERS and i + 1 < len(tokens) and not tokens[i + 1].isdigit():
+            nums.append(tokens[i + 1])
+    return tuple(nums)
+
+
+def signature(file_name):
+    """File name → NUM_PERM uint32 MinHash (नाम खाली हो तो None)"""
+    text = " ".join(_tokens(file_name))
+    if not text:
+        return None
+    shingles = {text[i:i + SHINGLE] for i in range(max(1, len(text) - SHINGLE + 1))}
+    # crc32 - processes के बीच stable (hash() हर run में बदलता है)
+    h = np.fromiter((zlib.crc32(s.encode()) & PRIME for s in shingles), dtype=np.int64, count=len(shingles))
+    return ((_A[:, None] * h[None, :] + _B[:, None]) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def size_bucket(file_size):
+    return int(math.log(max(file_size or 1, 1)) / _LOG_STEP)
+
+
+def lsh_keys(sig, file_size, spread=0):
+    """
+    Band hashes (int64) size bucket के साथ - doc में spread=0,
+    lookup में spread=1 ताकि bucket की सीमा पर पड़े sizes भी मिलें।
+    """
+    bucket = size_bucket(file_size)
+    keys = []
+    for b in range(BANDS):
+        band = sig[b * ROWS:(b + 1) * ROWS].tobytes()
+        for bk in range(bucket - spread, bucket + spread + 1):
+            digest = hashlib.blake2b(band + bytes([b]) + bk.to_bytes(4, "little", signed=True), digest_size=8).digest()
+            keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def lookup_keys(mh, file_size):
+    """Stored signature bytes → lookup keys (पड़ोसी size buckets समेत)"""
+    return lsh_keys(np.frombuffer(bytes(mh), dtype=np.uint32), file_size, spread=1)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard = बराबर MinHash slots का हिस्सा"""
+    a = np.frombuffer(bytes(sig_a), dtype=np.uint32)
+    b = np.frombuffer(bytes(sig_b), dtype=np.uint32)
+    if len(a) != len(b):
+        return 0.0
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def size_close(a, b, tolerance=SIZE_STEP):
+    a, b = a or 0, b or 0
+    return abs(a - b) <= tolerance * max(a, b, 1)
+
+
+def is_near_dup(cand, doc, threshold):
+    """
+    cand (DB / batch से) और doc (नई file) एक ही file हैं? Size, meta, numbers
+    बिल्कुल बराबर और नाम का MinHash threshold से ऊपर।
+    """
+    return (
+        size_close(cand.get("file_size"), doc["file_size"])
+        and all(cand.get(k) == doc.get(k) for k in NEAR_DUP_SAME)
+        and number_tokens(cand.get("file_name")) == number_tokens(doc["file_name"])
+        and similarity(cand.get("mh", b""), doc["mh"]) >= threshold
+    )
+
+
+def near_dup_fields(file_name, file_size):
+    """Doc में जाने वाले fields: mh (signature bytes) + lsh (band keys)"""
+    sig = signature(file_name)
+    if sig is None:
+        return {}
+    return {"mh": sig.tobytes(), "lsh": lsh_keys(sig, file_size)}
+
+
+def near_dup_batch(items):
+    """[(file_name, file_size)] → near_dup_fields list (backfill, process pool में)"""
+    return [near_dup_fields(name, size) for name, size in items]
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────
+# 📈 WRITE-BEHIND HIT COUNTER
+# ─────────────────────────────────────────
+class HitBuffer:
+    """
+    File deliveries RAM में गिनता है और हर `interval` सेकंड में
+    एक bulk write से flush करता है - हर download पर DB write नहीं।
+    """
+
+    def __init__(self, flush, interval=5):
+        self._flush = flush
+        self.interval = interval
+        self.pending = {}
+        self.flushed = 0
+
+    def hit(self, file_id, n=1):
+        self.pending[file_id] = self.pending.get(file_id, 0) + n
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        try:
+            await self._flush(batch)
+            self.flushed += sum(batch.values())
+        except Exception as e:
+            logger.error(f"Hit flush failed: {e}")
+            # Hits खोएं नहीं - अगली बार फिर कोशिश
+            for file_id, n in batch.items():
+                self.hit(file_id, n)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
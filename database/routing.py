@@ -0,0 +1,152 @@
+import math
+import hashlib
+import numpy as np
+
+
+# ─────────────────────────────────────────
+# 🌸 BLOOM FILTER (COMPACT MEMBERSHIP)
+# ─────────────────────────────────────────
+class BloomFilter:
+    """
+    Million ids के लिए कुछ MB - "शायद है" या "पक्का नहीं है"।
+    False positive सिर्फ एक extra find_one का खर्च है।
+    """
+
+    def __init__(self, capacity, fp_rate=0.01):
+        capacity = max(int(capacity), 1000)
+        self.size = int(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode() if isinstance(key, str) else bytes(key), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add_packed(self, packed, count):
+        """bloom_batch का नतीजा (unique byte index, OR किया mask) - सिर्फ एक vectorized OR"""
+        index, masks = packed
+        if len(index):
+            bits = np.frombuffer(self.bits, dtype=np.uint8)
+            bits[index] |= masks
+        self.count += count
+
+
+def bloom_batch(keys, size, hashes):
+    """
+    Keys → (byte index, mask) - BloomFilter._positions जैसे ही bits, पर hashing
+    process pool में। (h1 + i*h2) % size = (h1 % size + i*(h2 % size)) % size,
+    इसलिए uint64 में overflow नहीं होता।
+    """
+    h1, h2 = [], []
+    for key in keys:
+        digest = hashlib.blake2b(key.encode() if isinstance(key, str) else bytes(key), digest_size=16).digest()
+        h1.append(int.from_bytes(digest[:8], "little") % size)
+        h2.append((int.from_bytes(digest[8:], "little") | 1) % size)
+    if not h1:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8)
+    steps = np.arange(hashes, dtype=np.uint64)
+    pos = (np.array(h1, dtype=np.uint64)[:, None] + steps * np.array(h2, dtype=np.uint64)[:, None]) % np.uint64(size)
+    pos = np.sort(pos.ravel())
+    index = (pos >> np.uint64(3)).astype(np.int64)
+    masks = (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+    # एक byte के कई bits - main process में fancy-index OR के लिए unique index चाहिए
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    return index[starts], np.bitwise_or.reduceat(masks, starts)
+
+
+# ─────────────────────────────────────────
+# 🧭 COLLECTION ROUTING DIRECTORY
+# ─────────────────────────────────────────
+class CollectionRouter:
+    """file _id → वो collection(s) जहाँ file हो सकती है (priority order में)"""
+
+    def __init__(self, names, fp_rate=0.01):
+        self.names = list(names)
+        self.fp_rate = fp_rate
+        self.filters = {}
+        self.ready = False
+
+    def reset(self, name, capacity):
+        # Build से पहले collection size के हिसाब से filter बनाएं
+        self.filters[name] = BloomFilter(capacity, self.fp_rate)
+
+    def add(self, name, file_id):
+        bloom = self.filters.get(name)
+        if bloom is not None:
+            bloom.add(file_id)
+
+    def route(self, file_id):
+        return [n for n in self.names if n in self.filters and file_id in self.filters[n]]
+
+    def memory(self):
+        return sum(len(b.bits) for b in self.filters.values())
+
+
+# ─────────────────────────────────────────
+# 🚫 VOCABULARY FILTER (IMPOSSIBLE QUERIES)
+# ─────────────────────────────────────────
+class VocabularyFilter:
+    """
+    Indexed names के n-grams + caption tokens का Bloom filter।
+    Query का कोई भी token (या उसका prefix) इसमें नहीं → DB में कुछ नहीं मिलेगा।
+    False positive का मतलब सिर्फ एक normal search है, false negative नहीं होता।
+    """
+
+    def __init__(self, min_len=3, max_len=15, fp_rate=0.01, stem=None):
+        self.min_len = min_len
+        # वही stemmer जो build में terms के साथ stems डालता है (index_terms)
+        self.stem = stem
+        self.max_len = max_len
+        self.fp_rate = fp_rate
+        self.bloom = None
+        self.ready = False
+        self.rejected = 0
+
+    def reset(self, capacity):
+        self.bloom = BloomFilter(capacity, self.fp_rate)
+
+    def add(self, term):
+        if self.bloom is not None:
+            self.bloom.add(term[:self.max_len])
+
+    def batch_args(self):
+        """bloom_batch के लिए (size, hashes, max_len) - filter न हो तो None"""
+        if self.bloom is None:
+            return None
+        return self.bloom.size, self.bloom.hashes, self.max_len
+
+    def add_packed(self, packed, count):
+        if self.bloom is not None:
+            self.bloom.add_packed(packed, count)
+
+    def _known(self, token):
+        if len(token) < self.min_len:
+            # छोटे tokens पर फैसला नहीं (stop words / "s1" जैसे)
+            return True
+        if token[:self.max_len] in self.bloom:
+            return True
+        if self.stem is None:
+            # Stemmer नहीं - गलत reject से बेहतर है normal search
+            return True
+        # "stories" → "stori", "running" → "run": MongoDB $text भी stem पर match करता है
+        return self.stem(token)[:self.max_len] in self.bloom
+
+    def known(self, query):
+        """कोई token known हो तो True (filter तैयार न हो तब भी True)"""
+        if not self.ready or self.bloom is None:
+            return True
+        return any(self._known(t) for t in query.split())
+
+    def memory(self):
+        return len(self.bloom.bits) if self.bloom is not None else 0
@@ -0,0 +1,132 @@
+import time
+import asyncio
+from collections import OrderedDict
+
+
+# ─────────────────────────────────────────
+# ⚡ TTL + LRU RESULT CACHE
+# ─────────────────────────────────────────
+class SearchCache:
+    """
+    Bounded LRU cache जिसमें हर entry ttl सेकंड बाद expire होती है।
+    Key का दूसरा हिस्सा हमेशा collection होता है, ताकि insert पर
+    सिर्फ उसी collection (और "all") की entries हटें।
+    """
+
+    def __init__(self, maxsize=5000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        # hits/misses stats को छुए बिना (prefetch check के लिए)
+        item = self._data.get(key)
+        return item is not None and item[0] >= time.monotonic()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, collection):
+        """collection में नया डेटा आया - उससे जुड़ी entries हटाओ"""
+        dead = [k for k in self._data if k[1] in (collection, "all")]
+        for k in dead:
+            del self._data[k]
+        return len(dead)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        ratio = (self.hits / total * 100) if total else 0.0
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses, "ratio": ratio}
+
+
+# ─────────────────────────────────────────
+# 🛬 SINGLE-FLIGHT (REQUEST COALESCING)
+# ─────────────────────────────────────────
+class SingleFlight:
+    """
+    एक ही key की concurrent calls एक ही in-flight task share करती हैं।
+    नई release पर 50 लोग एक साथ वही title भेजें तो DB call सिर्फ एक।
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+
+    async def do(self, key, fn):
+        fut = self._flights.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        self.calls += 1
+        fut = asyncio.ensure_future(fn())
+        self._flights[key] = fut
+        # Leader cancel हो जाए तब भी बाकी waiters को result मिलेगा
+        fut.add_done_callback(lambda _: self._flights.pop(key, None))
+        return await asyncio.shield(fut)
+
+    def in_flight(self, key):
+        return key in self._flights
+
+    def stats(self):
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._flights)}
+
+
+# ─────────────────────────────────────────
+# 🔮 SPECULATIVE PREFETCH (BOUNDED)
+# ─────────────────────────────────────────
+class Prefetcher:
+    """
+    Background tasks जो अगला page पहले से cache में डालते हैं।
+    `limit` से ज्यादा in-flight हों तो नया prefetch skip - इंतज़ार नहीं,
+    ताकि foreground searches को DB connections मिलते रहें।
+    """
+
+    def __init__(self, limit=8):
+        self.limit = limit
+        self.started = 0
+        self.skipped = 0
+        self._tasks = set()
+
+    def submit(self, fn):
+        if len(self._tasks) >= self.limit:
+            self.skipped += 1
+            return False
+        self.started += 1
+        task = asyncio.create_task(fn())
+        # Reference रखें, वरना task GC हो सकता है
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+        return True
+
+    def _done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled():
+            # Prefetch failure सिर्फ एक missed optimization है
+            task.exception()
+
+    def stats(self):
+        return {"started": self.started, "skipped": self.skipped, "in_flight": len(self._tasks)}
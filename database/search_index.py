@@ -0,0 +1,196 @@
+import math
+import heapq
+import logging
+import threading
+from bisect import bisect_left, insort
+from database.file_meta import META_FIELDS, meta_match, prefix_terms
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────
+# ⚖️ WEIGHTS (MongoDB text index जैसे)
+# ─────────────────────────────────────────
+NAME_WEIGHT = 10
+CAPTION_WEIGHT = 5
+
+
+# ─────────────────────────────────────────
+# 🧠 IN-MEMORY INVERTED INDEX
+# ─────────────────────────────────────────
+class InvertedIndex:
+    """
+    token → posting list (compact int ids), हर collection के लिए अलग।
+    MongoDB सिर्फ system of record रहता है, सर्च यहाँ RAM में होती है।
+    normalize: वही normalizer जो query पर लगता है (normalize_query)।
+    Methods lock लेते हैं - async code बड़े batches thread में चलाता है।
+    """
+
+    def __init__(self, normalize):
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self._next = 0
+        self.ids = {}        # (source, file _id) -> int id (एक file कई collections में हो सकती है)
+        self.docs = {}       # int id -> (file _id, file_name, file_size, source, meta, tokens)
+        self.postings = {}   # source -> {token: {int id: weight}}
+        # Prefix lookup: बड़ी sorted list + छोटी sorted tail (नए tokens)।
+        # हर नए token पर बड़ी list में insort O(V) था (build quadratic) - tail
+        # भरने पर एक merge। हटे tokens lists में रह जाते हैं (lookup पर skip),
+        # ज्यादा हो जाएँ तो compact।
+        self.vocab = {}      # source -> sorted tokens
+        self._tail = {}      # source -> sorted नए tokens
+        self._dead = {}      # source -> lists में पड़े हटे tokens की गिनती
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, doc, source):
+        with self._lock:
+            return self._add(doc, source)
+
+    def add_many(self, docs, source):
+        """Startup build / bulk indexing - एक lock, हर doc पर O(tokens)"""
+        with self._lock:
+            return sum(self._add(doc, source) for doc in docs)
+
+    def _add(self, doc, source):
+        file_id = doc["_id"]
+        if (source, file_id) in self.ids:
+            return False
+        doc_id = self._next
+        self._next += 1
+        self.ids[(source, file_id)] = doc_id
+        meta = {k: doc[k] for k in META_FIELDS if k in doc} or None
+
+        col = self.postings.setdefault(source, {})
+        weights = {}
+        for token in self.normalize(doc.get("caption") or "").split():
+            weights[token] = CAPTION_WEIGHT
+        for token in self.normalize(doc.get("file_name") or "").split():
+            weights[token] = NAME_WEIGHT
+        for token, weight in weights.items():
+            if token not in col:
+                col[token] = {}
+                self._add_token(source, token)
+            col[token][doc_id] = weight
+        # Tokens साथ में - remove सिर्फ इन्हीं postings को छूता है, पूरे vocab को नहीं
+        self.docs[doc_id] = (file_id, doc.get("file_name", ""), doc.get("file_size", 0), source, meta, tuple(weights))
+        return True
+
+    def _add_token(self, source, token):
+        tail = self._tail.setdefault(source, [])
+        insort(tail, token)
+        vocab = self.vocab.setdefault(source, [])
+        if len(tail) > max(4096, len(vocab) // 20):
+            # दो sorted runs - timsort इन्हें linear time में merge करता है
+            vocab.extend(tail)
+            vocab.sort()
+            tail.clear()
+
+    def _compact(self, source):
+        """हटे tokens (और remove → add से बने duplicates) lists से बाहर"""
+        col = self.postings.get(source, {})
+        for lst in (self.vocab.get(source, []), self._tail.get(source, [])):
+            lst[:] = [t for i, t in enumerate(lst) if t in col and (i == 0 or lst[i - 1] != t)]
+        self._dead[source] = 0
+
+    def remove(self, file_ids, source):
+        with self._lock:
+            return self._remove(file_ids, source)
+
+    def _remove(self, file_ids, source):
+        """एक collection के कई ids एक साथ हटाएँ - सिर्फ उनके tokens की postings"""
+        col = self.postings.get(source, {})
+        removed = empty = 0
+        for file_id in file_ids:
+            doc_id = self.ids.pop((source, file_id), None)
+            if doc_id is None:
+                continue
+            removed += 1
+            for token in self.docs.pop(doc_id)[5]:
+                posting = col.get(token)
+                if posting is None:
+                    continue
+                posting.pop(doc_id, None)
+                if not posting:
+                    # खाली posting lists हटा दें ताकि RAM न बढ़े
+                    del col[token]
+                    empty += 1
+        if empty:
+            self._dead[source] = self._dead.get(source, 0) + empty
+            if self._dead[source] > max(4096, len(self.vocab.get(source, ())) // 5):
+                self._compact(source)
+        return removed
+
+    def search(self, query, source, offset=0, limit=10, flt=None):
+        """(docs, total) लौटाता है - बिल्कुल _search() जैसा shape"""
+        with self._lock:
+            return self._search(query, source, offset, limit, flt)
+
+    def _search(self, query, source, offset, limit, flt):
+        col = self.postings.get(source)
+        tokens = set(query.split())
+        if not col or not tokens:
+            return [], 0
+
+        n_docs = len(self.docs) or 1
+        scores = {}
+        for token in tokens:
+            posting = col.get(token)
+            if not posting:
+                continue
+            idf = math.log(1 + n_docs / len(posting))
+            for doc_id, weight in posting.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf
+
+        # Metadata filter ranking से पहले - total और pages सही रहें
+        if flt:
+            scores = {d: sc for d, sc in scores.items() if meta_match(self.docs[d][4] or {}, flt)}
+
+        return self._page(scores, offset, limit)
+
+    def prefix_search(self, query, source, offset=0, limit=10, flt=None):
+        """हर query token किसी indexed शब्द का prefix हो (AND) - "stran thin" """
+        with self._lock:
+            return self._prefix_search(query, source, offset, limit, flt)
+
+    def _prefix_search(self, query, source, offset, limit, flt):
+        col = self.postings.get(source)
+        terms = prefix_terms(query)
+        if not col or not terms:
+            return [], 0
+        lists = (self.vocab.get(source, ()), self._tail.get(source, ()))
+
+        scores = None
+        for term in terms:
+            matched = {}
+            for vocab in lists:
+                i = bisect_left(vocab, term)
+                while i < len(vocab) and vocab[i].startswith(term):
+                    # हटा हुआ token (compact बाकी) / duplicate - max weight से असर नहीं
+                    for doc_id, weight in col.get(vocab[i], {}).items():
+                        if weight > matched.get(doc_id, 0):
+                            matched[doc_id] = weight
+                    i += 1
+            if scores is None:
+                scores = matched
+            else:
+                scores = {d: sc + matched[d] for d, sc in scores.items() if d in matched}
+            if not scores:
+                return [], 0
+
+        if flt:
+            scores = {d: sc for d, sc in scores.items() if meta_match(self.docs[d][4] or {}, flt)}
+        return self._page(scores, offset, limit)
+
+    def _page(self, scores, offset, limit):
+        total = len(scores)
+        if offset >= total:
+            return [], total
+
+        # पूरा sort करने के बजाय सिर्फ जरूरी top-N निकालें
+        top = heapq.nsmallest(offset + limit, scores.items(), key=lambda x: (-x[1], x[0]))
+        docs = []
+        for doc_id, score in top[offset:]:
+            file_id, name, size = self.docs[doc_id][:3]
+            docs.append({"_id": file_id, "file_name": name, "file_size": size, "score": score})
+        return docs, total
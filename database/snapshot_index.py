@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+import numpy as np
+from database.columnar_index import (
+    filter_rows, make_doc, search_segments, prefix_search_segments, _id_key, _id_hash, _source_key
+)
+
+logger = logging.getLogger(__name__)
+
+# 2: id lookup (collection, _id) key पर
+SNAPSHOT_FORMAT = 2
+# ColumnarIndex के doc columns जो as-is disk पर जाते हैं
+DOC_COLUMNS = (
+    "name_blob", "name_off", "id_blob", "id_off", "id_kind", "id_hash", "size",
+    "source", "alive", "lang", "quality", "year", "season", "episode"
+)
+
+
+class _Frozen:
+    """mmap array जो _Column जैसा दिखता है (.data / .size)"""
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+
+
+# ─────────────────────────────────────────
+# 💾 SNAPSHOT WRITER
+# ─────────────────────────────────────────
+def write_snapshot(index, path):
+    """
+    ColumnarIndex → directory of .npy files (sorted term dictionary,
+    term-sorted postings, doc table)। पहले tmp में लिखकर rename,
+    ताकि चल रहे processes का पुराना mmap valid रहे।
+    """
+    with index._lock:
+        tokens = sorted(index.terms)
+        remap = np.empty(len(tokens), dtype=np.int32)
+        for pos, token in enumerate(tokens):
+            remap[index.terms[token]] = pos
+        encoded = [t.encode() for t in tokens]
+        terms_off = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in encoded], out=terms_off[1:])
+
+        tok_ids = remap[index.tok_ids.view]
+        order = np.argsort(tok_ids, kind="stable")
+        df = np.empty(len(tokens), dtype=np.int32)
+        df[remap] = index.df.view
+
+        keys = _source_key(index.id_hash.view, index.source.view)
+        id_order = np.argsort(keys, kind="stable")
+        arrays = {
+            "terms_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "terms_off": terms_off,
+            "df": df,
+            "post_start": np.concatenate(([0], np.cumsum(np.bincount(tok_ids, minlength=len(tokens))))),
+            "post_docs": index.tok_doc.view[order],
+            "hash_sorted": keys[id_order],
+            "hash_rows": id_order.astype(np.int32),
+        }
+        arrays.update({name: getattr(index, name).view for name in DOC_COLUMNS})
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "sources": sorted(index.sources, key=index.sources.get),
+            "languages": sorted(index.languages, key=index.languages.get),
+            "qualities": sorted(index.qualities, key=index.qualities.get),
+            "count": len(index),
+            "terms": len(tokens),
+            "created": time.time(),
+        }
+
+    tmp, old = f"{path}.tmp", f"{path}.old"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    size = 0
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arr))
+        size += arr.nbytes
+    # meta.json आखिर में - इसके बिना snapshot अधूरा माना जाता है
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old)
+    os.rename(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return meta["count"], size
+
+
+# ─────────────────────────────────────────
+# 🗺 MEMORY-MAPPED SNAPSHOT SEGMENT
+# ─────────────────────────────────────────
+class SnapshotSegment:
+    """
+    Read-only mmap segment - कई bot processes एक ही page cache share करते हैं,
+    startup पर कुछ load नहीं होता। `alive` copy-on-write mmap है: deletes सिर्फ
+    बदले हुए pages को private बनाते हैं।
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"unsupported snapshot format {meta.get('format')}")
+        self.meta = meta
+        self.sources = {name: code for code, name in enumerate(meta["sources"])}
+        self.languages = {lang: bit for bit, lang in enumerate(meta["languages"])}
+        self.qualities = {q: code for code, q in enumerate(meta["qualities"])}
+        self.count = meta["count"]
+
+        def load(name, mode="r"):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+
+        for name in DOC_COLUMNS:
+            setattr(self, name, _Frozen(load(name, "c" if name == "alive" else "r")))
+        for name in ("terms_blob", "terms_off", "df", "post_start", "post_docs", "hash_sorted", "hash_rows"):
+            setattr(self, name, load(name))
+        self.rows = len(self.alive.data)
+
+    def __len__(self):
+        return self.count
+
+    # ─── TERM DICTIONARY (binary search, कोई Python dict नहीं) ───
+    def _term(self, i):
+        return self.terms_blob[self.terms_off[i]:self.terms_off[i + 1]].tobytes()
+
+    def _lower_bound(self, key):
+        lo, hi = 0, len(self.terms_off) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _tid(self, token):
+        key = token.encode()
+        i = self._lower_bound(key)
+        return i if i < len(self.terms_off) - 1 and self._term(i) == key else None
+
+    def _df(self, tid):
+        return int(self.df[tid])
+
+    def _prefix_tids(self, term):
+        # Normalized tokens [a-z0-9] हैं - आखिरी char +1 = range का अंत
+        lo = self._lower_bound(term.encode())
+        hi = self._lower_bound((term[:-1] + chr(ord(term[-1]) + 1)).encode())
+        return np.arange(lo, hi, dtype=np.int32)
+
+    def _rows_with(self, tids):
+        starts, ends = self.post_start[tids], self.post_start[tids + 1]
+        rows = np.concatenate([self.post_docs[s:e] for s, e in zip(starts, ends)] or [np.empty(0, np.int32)])
+        return rows, np.repeat(tids, ends - starts)
+
+    def _filter(self, rows, source, flt):
+        return filter_rows(self, rows, source, flt)
+
+    def _doc(self, row, score):
+        return make_doc(self, row, score)
+
+    # ─── ID LOOKUP + TOMBSTONES ───
+    def find(self, file_ids, source):
+        """एक collection के file _ids → live snapshot rows (-1 = नहीं है); 64-bit key पर lookup"""
+        code = self.sources.get(source)
+        if code is None or not len(self.hash_sorted):
+            return np.full(len(file_ids), -1, dtype=np.int64)
+        hashes = _source_key([_id_hash(*_id_key(i)) for i in file_ids], code)
+        idx = np.searchsorted(self.hash_sorted, hashes)
+        idx[idx >= len(self.hash_sorted)] = 0
+        rows = np.where(self.hash_sorted[idx] == hashes, self.hash_rows[idx], -1)
+        rows[rows >= 0] = np.where(self.alive.data[rows[rows >= 0]], rows[rows >= 0], -1)
+        return rows
+
+    def kill(self, rows):
+        # df नहीं घटता (read-only) - idf में हल्का drift, अगला export ठीक कर देता है
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[self.alive.data[rows]]
+        self.alive.data[rows] = False
+        self.count -= len(rows)
+        return len(rows)
+
+
+# ─────────────────────────────────────────
+# 🧅 SNAPSHOT + DELTA
+# ─────────────────────────────────────────
+class LayeredIndex:
+    """
+    mmap snapshot के ऊपर RAM delta (ColumnarIndex) - save_file के नए docs
+    delta में जाते हैं, deletes snapshot में tombstone बनते हैं।
+    दोनों segments एक ही idf से score होकर एक list में merge होते हैं।
+    """
+
+    def __init__(self, snapshot, delta):
+        self.snapshot = snapshot
+        self.delta = delta
+        self._lock = threading.Lock()
+        # Startup catch-up scan में जो snapshot rows DB में मिलीं
+        self._seen = np.zeros(snapshot.rows, dtype=np.bool_)
+
+    def __len__(self):
+        return len(self.snapshot) + len(self.delta)
+
+    def add(self, doc, source):
+        with self._lock:
+            if self.snapshot.find([doc["_id"]], source)[0] >= 0:
+                return False
+        return self.delta.add(doc, source)
+
+    def add_many(self, docs, source):
+        """Catch-up scan: snapshot में मौजूद docs mark, बाकी delta में"""
+        with self._lock:
+            rows = self.snapshot.find([doc["_id"] for doc in docs], source)
+            if self._seen is not None:
+                self._seen[rows[rows >= 0]] = True
+        return self.delta.add_many([doc for doc, row in zip(docs, rows) if row < 0], source)
+
+    def remove(self, file_ids, source):
+        file_ids = list(file_ids)
+        with self._lock:
+            rows = self.snapshot.find(file_ids, source)
+            removed = self.snapshot.kill(rows[rows >= 0])
+        return removed + self.delta.remove([i for i, row in zip(file_ids, rows) if row < 0], source)
+
+    def finish_catch_up(self):
+        """Snapshot की वो rows जो अब DB में नहीं (export के बाद delete) → tombstone"""
+        with self._lock:
+            if self._seen is None:
+                return 0
+            gone = self.snapshot.kill(np.flatnonzero(~self._seen))
+            self._seen = None
+        return gone
+
+    def search(self, query, source, offset=0, limit=10, flt=None):
+        with self._lock, self.delta._lock:
+            return search_segments([self.snapshot, self.delta], query, source, offset, limit, flt)
+
+    def prefix_search(self, query, source, offset=0, limit=10, flt=None):
+        with self._lock, self.delta._lock:
+            return prefix_search_segments([self.snapshot, self.delta], query, source, offset, limit, flt)
@@ -0,0 +1,147 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────
+# 📏 EDIT DISTANCE (Damerau / OSA)
+# ─────────────────────────────────────────
+def edit_distance(a, b, max_d):
+    """max_d से ज्यादा हुआ तो max_d + 1 लौटाता है (early exit)"""
+    if abs(len(a) - len(b)) > max_d:
+        return max_d + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_d:
+            return max_d + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+# ─────────────────────────────────────────
+# 🔤 SYMMETRIC-DELETE SPELL CORRECTOR
+# ─────────────────────────────────────────
+class SymSpell:
+    """
+    SymSpell जैसा dictionary: हर शब्द के "deletes" पहले से index में,
+    इसलिए lookup सिर्फ कुछ dict hits है - कोई full scan नहीं।
+    """
+
+    def __init__(self, max_distance=2, prefix_length=7, min_length=3):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+        self.ready = False
+        self.words = {}      # word -> frequency
+        self.deletes = {}    # delete variant -> [words]
+
+    def __len__(self):
+        return len(self.words)
+
+    def _variants(self, word):
+        word = word[:self.prefix_length]
+        out = {word}
+        edge = [word]
+        for _ in range(self.max_distance):
+            nxt = []
+            for w in edge:
+                if len(w) <= 1:
+                    continue
+                for i in range(len(w)):
+                    d = w[:i] + w[i + 1:]
+                    if d not in out:
+                        out.add(d)
+                        nxt.append(d)
+            edge = nxt
+        return out
+
+    def add(self, word):
+        if len(word) < self.min_length or word.isdigit():
+            return
+        if word in self.words:
+            self.words[word] += 1
+            return
+        self.words[word] = 1
+        for d in self._variants(word):
+            self.deletes.setdefault(d, []).append(word)
+
+    def add_text(self, text):
+        for word in text.split():
+            self.add(word)
+
+    def batch_args(self):
+        """spell_batch के लिए settings"""
+        return self.max_distance, self.prefix_length, self.min_length
+
+    def merge(self, batch):
+        """
+        spell_batch का नतीजा (या उसका slice) - variants worker में बन चुके,
+        यहाँ सिर्फ dict inserts। पहले से मौजूद शब्दों की सिर्फ frequency बढ़ती है।
+        """
+        for word, count, variants in batch:
+            if word in self.words:
+                self.words[word] += count
+                continue
+            self.words[word] = count
+            for d in variants:
+                self.deletes.setdefault(d, []).append(word)
+
+    def candidates(self, query):
+        """
+        Query tokens → [(token, max_d, [(word, freq)])] - सिर्फ dict lookups।
+        Known / छोटे tokens के लिए candidates None (जैसे हैं वैसे रहेंगे)।
+        """
+        out = []
+        for token in query.split():
+            if len(token) < self.min_length or token.isdigit() or token in self.words:
+                out.append((token, 0, None))
+                continue
+            # छोटे शब्दों में 2 edits से पूरा शब्द ही बदल जाता है
+            max_d = 1 if len(token) <= 4 else self.max_distance
+            words = {w for d in self._variants(token) for w in self.deletes.get(d, ())}
+            out.append((token, max_d, [(w, self.words[w]) for w in words]))
+        return out
+
+    def correct(self, query):
+        """Normalized query के unknown tokens को ठीक करता है"""
+        return rank_candidates(self.candidates(query))
+
+
+def spell_batch(texts, max_distance, prefix_length, min_length):
+    """
+    Normalized texts → [(word, count, delete variants)] - process pool में,
+    ताकि startup build में variants (ज्यादातर CPU) event loop पर न बनें।
+    """
+    helper = SymSpell(max_distance, prefix_length, min_length)
+    counts = {}
+    for text in texts:
+        for word in text.split():
+            if len(word) >= min_length and not word.isdigit():
+                counts[word] = counts.get(word, 0) + 1
+    return [(word, n, tuple(helper._variants(word))) for word, n in counts.items()]
+
+
+def rank_candidates(items):
+    """
+    Edit distance वाला CPU हिस्सा - plain data in/out, इसलिए process pool
+    में भी चल सकता है। सबसे नजदीकी शब्द (कम distance, फिर ज्यादा frequency)।
+    """
+    out = []
+    for token, max_d, cands in items:
+        best, best_key = None, None
+        for word, freq in cands or ():
+            dist = edit_distance(token, word, max_d)
+            if dist > max_d:
+                continue
+            key = (dist, -freq, word)
+            if best_key is None or key < best_key:
+                best, best_key = word, key
+        out.append(best or token)
+    return " ".join(out)
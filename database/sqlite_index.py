@@ -0,0 +1,186 @@
+import sqlite3
+import logging
+import threading
+from database.file_meta import META_FIELDS, prefix_terms
+
+logger = logging.getLogger(__name__)
+
+# ids table (source, file _id) पर - पुराने format वाली file rebuild होती है
+SCHEMA_VERSION = 2
+# Catch-up: ids की वो rows जो startup scan में MongoDB में नहीं मिलीं
+UNSEEN = "NOT EXISTS (SELECT 1 FROM seen WHERE seen.src = ids.src AND seen.file_id = ids.file_id)"
+# bm25 column weights: name, caption, src, tags (MongoDB text index जैसे)
+BM25 = "bm25(files, 10.0, 5.0, 0.0, 0.0)"
+
+
+def _tags(doc):
+    """Metadata → FTS tokens: langhindi quality1080p year2019 season1 ..."""
+    out = []
+    for key in META_FIELDS:
+        value = doc.get(key)
+        if value is None:
+            continue
+        for v in (value if isinstance(value, list) else [value]):
+            out.append(f"{key}{v}")
+    return " ".join(out)
+
+
+def _flt_expr(flt):
+    terms = []
+    for key, value in (flt or {}).items():
+        terms.append(f'tags : "{key}{value}"')
+    return terms
+
+
+# ─────────────────────────────────────────
+# 🗃 SQLITE FTS5 INDEX (LOCAL, NO NETWORK)
+# ─────────────────────────────────────────
+class SqliteIndex:
+    """
+    Single-node deployment के लिए local full-text index।
+    bm25 ranking + prefix queries, MongoDB सिर्फ system of record।
+    Methods blocking हैं - async code इन्हें thread में चलाता है।
+    """
+
+    def __init__(self, path, normalize):
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # पुराना schema (सिर्फ file_id key) - खाली करके startup build से भरें
+            self.conn.execute("DROP TABLE IF EXISTS files")
+            self.conn.execute("DROP TABLE IF EXISTS ids")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS files USING fts5("
+            "name, caption, src, tags, file_id UNINDEXED, file_name UNINDEXED, "
+            "file_size UNINDEXED, prefix='3 4 5 6')"
+        )
+        # (collection, file _id) → FTS rowid (UNINDEXED column पर delete scan से बचने के लिए)
+        # एक ही file Primary और Cloud दोनों में हो सकती है
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ids (src TEXT, file_id, rid INTEGER, PRIMARY KEY (src, file_id))"
+        )
+        self.conn.commit()
+        self._catching_up = False
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT count(*) FROM ids").fetchone()[0]
+
+    def _insert(self, doc, source):
+        cur = self.conn.execute("INSERT OR IGNORE INTO ids (src, file_id) VALUES (?, ?)", (source, doc["_id"]))
+        if not cur.rowcount:
+            return False
+        cur = self.conn.execute(
+            "INSERT INTO files (name, caption, src, tags, file_id, file_name, file_size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.normalize(doc.get("file_name")), self.normalize(doc.get("caption")),
+                source, _tags(doc), doc["_id"], doc.get("file_name", ""), doc.get("file_size", 0)
+            )
+        )
+        self.conn.execute(
+            "UPDATE ids SET rid = ? WHERE src = ? AND file_id = ?", (cur.lastrowid, source, doc["_id"])
+        )
+        return True
+
+    def add(self, doc, source):
+        with self._lock:
+            added = self._insert(doc, source)
+            self.conn.commit()
+        return added
+
+    def add_many(self, docs, source):
+        """Startup build के लिए - पूरा batch एक transaction में"""
+        with self._lock:
+            added = sum(self._insert(doc, source) for doc in docs)
+            if self._catching_up:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO seen (src, file_id) VALUES (?, ?)",
+                    [(source, doc["_id"]) for doc in docs]
+                )
+            self.conn.commit()
+        return added
+
+    # ─── CATCH-UP (disk पर पड़ी file बनाम MongoDB) ───
+    def begin_catch_up(self):
+        """
+        Startup scan के दौरान जो (collection, _id) MongoDB में मिले वो `seen` में।
+        दूसरी replica के deletes, insert और index के बीच crash, /migrateids -
+        सब finish_catch_up में ठीक होते हैं।
+        """
+        with self._lock:
+            self.conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS seen (src TEXT, file_id, PRIMARY KEY (src, file_id))"
+            )
+            self.conn.execute("DELETE FROM seen")
+            self._catching_up = True
+
+    def finish_catch_up(self):
+        """File की वो rows जो scan में नहीं मिलीं (MongoDB से हट चुकीं) → delete"""
+        with self._lock:
+            if not self._catching_up:
+                return 0
+            self.conn.execute(f"DELETE FROM files WHERE rowid IN (SELECT rid FROM ids WHERE {UNSEEN})")
+            removed = self.conn.execute(f"DELETE FROM ids WHERE {UNSEEN}").rowcount
+            self.conn.execute("DROP TABLE seen")
+            self.conn.commit()
+            self._catching_up = False
+        return removed
+
+    def remove(self, file_ids, source):
+        removed = 0
+        with self._lock:
+            for file_id in file_ids:
+                row = self.conn.execute(
+                    "SELECT rid FROM ids WHERE src = ? AND file_id = ?", (source, file_id)
+                ).fetchone()
+                if row is None:
+                    continue
+                self.conn.execute("DELETE FROM files WHERE rowid = ?", (row[0],))
+                self.conn.execute("DELETE FROM ids WHERE src = ? AND file_id = ?", (source, file_id))
+                removed += 1
+            self.conn.commit()
+        return removed
+
+    def _run(self, match, offset, limit, cap):
+        sql = (
+            f"SELECT file_id, file_name, file_size, -{BM25} FROM files "
+            f"WHERE files MATCH ? ORDER BY {BM25} LIMIT ? OFFSET ?"
+        )
+        with self._lock:
+            rows = self.conn.execute(sql, (match, limit + 1, offset)).fetchall()
+            if len(rows) <= limit:
+                total = offset + len(rows) if rows else 0
+            else:
+                total = self.conn.execute(
+                    "SELECT count(*) FROM (SELECT 1 FROM files WHERE files MATCH ? LIMIT ?)",
+                    (match, cap)
+                ).fetchone()[0]
+                total = max(total, offset + limit + 1)
+        docs = [
+            {"_id": r[0], "file_name": r[1], "file_size": r[2], "score": r[3]}
+            for r in rows[:limit]
+        ]
+        return docs, total
+
+    def search(self, query, source, offset=0, limit=10, flt=None, cap=1000):
+        """किसी भी token का match (MongoDB $text जैसा OR), bm25 से ranked"""
+        tokens = sorted(set(query.split()))
+        if not tokens:
+            return [], 0
+        words = " OR ".join(f'"{t}"' for t in tokens)
+        match = " AND ".join([f'src : "{source}"', f"{{name caption}} : ({words})"] + _flt_expr(flt))
+        return self._run(match, offset, limit, cap)
+
+    def prefix_search(self, query, source, offset=0, limit=10, flt=None, cap=1000):
+        """हर token किसी शब्द का prefix हो (AND) - "stran thin" """
+        terms = prefix_terms(query)
+        if not terms:
+            return [], 0
+        words = " AND ".join(f'"{t}"*' for t in terms)
+        match = " AND ".join([f'src : "{source}"', f"name : ({words})"] + _flt_expr(flt))
+        return self._run(match, offset, limit, cap)
@@ -1,4 +1,5 @@
 import motor.motor_asyncio
+from datetime import datetime, timezone
 from info import (
     BOT_ID,
     DATABASE_URL,
@@ -31,6 +32,7 @@ class Database:
         self.premium = self.db.Premiums
         self.connections = self.db.Connections
         self.settings = self.db.Settings
+        self.index_jobs = self.db.IndexJobs
 
     # Default settings
     default_setgs = {
@@ -226,6 +228,33 @@ class Database:
         stats = await self.db.command("dbstats")
         return stats["dataSize"]
         
+    # ───────── INDEX JOBS (RESUMABLE) ─────────
+
+    async def start_index_job(self, job):
+        """एक channel + collection = एक job; नया run पुराने checkpoint को बदल देता है"""
+        job_id = f"{job['chat']}:{job['collection']}"
+        await self.index_jobs.replace_one(
+            {"_id": job_id},
+            {**job, "status": "running", "updated": datetime.now(timezone.utc)},
+            upsert=True
+        )
+        return job_id
+
+    async def checkpoint_index_job(self, job_id, last_id, counters):
+        await self.index_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"last_id": last_id, "counters": counters, "updated": datetime.now(timezone.utc)}}
+        )
+
+    async def finish_index_job(self, job_id, status):
+        await self.index_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": status, "updated": datetime.now(timezone.utc)}}
+        )
+
+    async def get_running_index_jobs(self):
+        return await self.index_jobs.find({"status": "running"}).to_list(length=None)
+
     # ───────── STARTUP SUPPORT (ADDED MISSING FUNCTION) ─────────
     async def get_banned(self):
         """Returns list of banned users and disabled chats"""
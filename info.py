@@ -73,6 +73,10 @@ INDEX_CHANNELS = [
     int(x) if x.startswith("-") else x
     for x in environ.get("INDEX_CHANNELS", "").split()
 ]
+# Channel indexing में एक insert_many में कितनी files
+INDEX_BATCH_SIZE = int(environ.get("INDEX_BATCH_SIZE", 200))
+# Fetcher कितने 200-message pages आगे रहे (parse / write के साथ overlap)
+INDEX_PREFETCH_PAGES = int(environ.get("INDEX_PREFETCH_PAGES", 3))
 
 LOG_CHANNEL = int(environ.get("LOG_CHANNEL", "0"))
 if not LOG_CHANNEL:
@@ -131,6 +135,63 @@ IS_STREAM = is_enabled("IS_STREAM", True)
 IS_PREMIUM = is_enabled("IS_PREMIUM", True)
 
 
+# ─────────────────────────────────────────────
+# 🔍 SEARCH ENGINE
+# ─────────────────────────────────────────────
+# RAM में inverted index - MongoDB सिर्फ storage रहेगा
+USE_MEMORY_INDEX = is_enabled("USE_MEMORY_INDEX", False)
+# Search backend: mongo / memory / sqlite / columnar / snapshot (USE_MEMORY_INDEX = memory)
+SEARCH_BACKEND = environ.get(
+    "SEARCH_BACKEND", "memory" if USE_MEMORY_INDEX else "mongo"
+).lower()
+SQLITE_INDEX_PATH = environ.get("SQLITE_INDEX_PATH", "search_index.db")
+# /exportindex का mmap snapshot directory (SEARCH_BACKEND=snapshot)
+SNAPSHOT_PATH = environ.get("SNAPSHOT_PATH", "search_snapshot")
+# File send पर सिर्फ सही collection query हो (Bloom filter directory)
+FILE_ROUTING = is_enabled("FILE_ROUTING", True)
+# नई files का _id: string (पुराना) या binary (छोटा index) - /migrateids से पुराना डेटा बदलें
+FILE_ID_MODE = environ.get("FILE_ID_MODE", "string").lower()
+# Ranking में downloads का असर (0 = सिर्फ text score), half-life दिनों में
+POPULARITY_WEIGHT = float(environ.get("POPULARITY_WEIGHT", 1.0))
+POPULARITY_HALF_LIFE = float(environ.get("POPULARITY_HALF_LIFE", 7))
+HIT_FLUSH_INTERVAL = int(environ.get("HIT_FLUSH_INTERVAL", 5))
+# CPU-heavy search काम (fuzzy matching, bulk normalization) के लिए processes (0 = inline)
+CPU_WORKERS = int(environ.get("CPU_WORKERS", 0))
+# अगले page के background prefetch की global limit (0 = बंद)
+PREFETCH_MAX = int(environ.get("PREFETCH_MAX", 8))
+# Zero-result queries कितनी देर याद रखें (सेकंड)
+NEGATIVE_CACHE_TTL = int(environ.get("NEGATIVE_CACHE_TTL", 60))
+# Known-token Bloom filter - startup पर सारे names + captions scan (opt-in)
+VOCAB_FILTER = is_enabled("VOCAB_FILTER", False)
+# Startup पर top N queries से cache warmup (0 = बंद)
+WARMUP_QUERIES = int(environ.get("WARMUP_QUERIES", 200))
+WARMUP_CONCURRENCY = int(environ.get("WARMUP_CONCURRENCY", 8))
+# Query analytics: RAM buffer size और QueryLog retention (दिन)
+QUERY_LOG_SIZE = int(environ.get("QUERY_LOG_SIZE", 10000))
+QUERY_LOG_DAYS = int(environ.get("QUERY_LOG_DAYS", 30))
+# एक season के episodes को "📂 N files" entry में समेटें (MongoDB backend)
+# हर page पर सारे matches का $group + group count - keyset pagination नहीं लगता
+GROUP_RESULTS = is_enabled("GROUP_RESULTS", False)
+# Re-uploads (MinHash नाम + size): off / flag (search में छिपे) / skip (save ही नहीं)
+# Opt-in - पुरानी files के signatures के लिए पहले backfill चलाएँ
+NEAR_DUP_MODE = environ.get("NEAR_DUP_MODE", "off").lower()
+NEAR_DUP_THRESHOLD = float(environ.get("NEAR_DUP_THRESHOLD", 0.85))
+# Result cache की max entries (TTL = CACHE_TIME)
+SEARCH_CACHE_SIZE = int(environ.get("SEARCH_CACHE_SIZE", 5000))
+# इससे ज्यादा matches गिने नहीं जाते - UI में "1000+" दिखेगा
+SEARCH_COUNT_CAP = int(environ.get("SEARCH_COUNT_CAP", 1000))
+# Deep pages पर skip की जगह (score, _id) keyset
+KEYSET_PAGINATION = is_enabled("KEYSET_PAGINATION", True)
+# "all" mode में तीनों collections एक साथ सर्च करके merge करें
+SEARCH_FANOUT = is_enabled("SEARCH_FANOUT", False)
+SEARCH_TIMEOUT = float(environ.get("SEARCH_TIMEOUT", 3))
+# Typo dictionary (SymSpell) - RAM + startup build, इसलिए opt-in।
+# बिना इसके groups का spell_check setting कुछ नहीं करता
+SPELL_INDEX = is_enabled("SPELL_INDEX", False)
+# SPELL_INDEX के लिए max edit distance (ज्यादा = ज्यादा RAM)
+SPELL_MAX_DISTANCE = int(environ.get("SPELL_MAX_DISTANCE", 2))
+
+
 # ─────────────────────────────────────────────
 # 📝 TEXT / CAPTION
 # ─────────────────────────────────────────────
@@ -8,7 +8,12 @@ from hydrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from Script import script
 # Note: Media is imported but not used for search logic anymore
-from database.ia_filterdb import db_count_documents, get_file_details, delete_files
+from database.ia_filterdb import (
+    db_count_documents, get_file_details, delete_files, backfill_search_fields, migrate_file_ids,
+    export_search_snapshot, get_group_files,
+    record_file_hit, top_queries,
+    SEARCH_CACHE, NEGATIVE_CACHE, SEARCH_FLIGHTS, PREFETCH, BACKEND, VOCAB, CPU
+)
 from database.users_chats_db import db
 
 from info import (
@@ -82,6 +87,25 @@ async def start(client, message):
         try:
             data = message.command[1]
             parts = data.split("_")
+
+            # 📂 Season group (start=grp_chatid_group) - episodes की list
+            if parts[0] == "grp" and len(parts) >= 3:
+                files = await get_group_files(parts[2])
+                if not files:
+                    return await message.reply("❌ **Files Not Found!**\n\nThe link may be old or invalid.")
+                lines = [
+                    f"📁 <a href='https://t.me/{temp.U_NAME}?start=file_{parts[1]}_{file['_id']}'>"
+                    f"[{get_size(file.get('file_size', 0))}] {file.get('file_name', 'File')}</a>"
+                    for file in files
+                ]
+                # Telegram message limit (4096) के हिसाब से टुकड़े
+                chunk = []
+                for line in lines:
+                    if chunk and len("\n\n".join(chunk + [line])) > 4000:
+                        await message.reply("\n\n".join(chunk), disable_web_page_preview=True)
+                        chunk = []
+                    chunk.append(line)
+                return await message.reply("\n\n".join(chunk), disable_web_page_preview=True)
             
             if len(parts) >= 3:
                 try: await message.delete()
@@ -95,6 +119,7 @@ async def start(client, message):
                 
                 if not file:
                     return await message.reply("❌ **File Not Found!**\n\nThe file may have been deleted or the link is invalid.")
+                record_file_hit(file_id)
                 
                 settings = await get_settings(grp_id)
                 cap_template = settings.get('caption', '{file_name}\n\n💾 Size: {file_size}')
@@ -179,6 +204,9 @@ async def stats(_, message):
     users = await db.total_users_count()
     chats = await db.total_chat_count()
     premium = await db.premium.count_documents({"status.premium": True})
+    cache = SEARCH_CACHE.stats()
+    flights = SEARCH_FLIGHTS.stats()
+    prefetch = PREFETCH.stats()
 
     await msg.edit(f"""
 📊 <b>Status</b>
@@ -186,8 +214,95 @@ async def stats(_, message):
 💎 Premium: `{premium}`
 📁 Files: `{files['total']}`
  • Pri: `{files['primary']}` | Cld: `{files['cloud']}` | Arc: `{files['archive']}`
+⚡ Cache: `{cache['size']}` | Hits: `{cache['hits']}` | Miss: `{cache['misses']}` ({cache['ratio']:.1f}%)
+🛬 Searches: `{flights['calls']}` | Coalesced: `{flights['coalesced']}`
+🚫 Empty cached: `{len(NEGATIVE_CACHE)}` | Rejected: `{VOCAB.rejected if VOCAB is not None else '-'}`
+🔮 Prefetch: `{prefetch['started']}` | Skipped: `{prefetch['skipped']}`
+🔌 Backend: `{BACKEND.name}` ({'ready' if BACKEND.ready else 'building'})
+🧵 CPU Pool: `{CPU.workers}` workers | Offloaded: `{CPU.calls}`
 """)
 
+# ─────────────────────────
+# /backfill COMMAND
+# ─────────────────────────
+@Client.on_message(filters.command("backfill") & filters.user(ADMINS))
+async def backfill(_, message):
+    msg = await message.reply("🏷 Updating search fields (metadata + prefixes) for old files...")
+    start = time_now()
+    updated = await backfill_search_fields()
+    await msg.edit(f"✅ Search fields updated for `{updated}` files in {get_readable_time(time_now() - start)}")
+
+# ─────────────────────────
+# /migrateids COMMAND
+# ─────────────────────────
+@Client.on_message(filters.command("migrateids") & filters.user(ADMINS))
+async def migrate_ids(_, message):
+    msg = await message.reply("🆔 Migrating string file ids to binary...")
+    start = time_now()
+    last_edit = [0]
+
+    async def progress(name, done):
+        # हर 10 सेकंड में एक edit (FloodWait से बचने के लिए)
+        if time_now() - last_edit[0] > 10:
+            last_edit[0] = time_now()
+            try: await msg.edit(f"🆔 Migrating <b>{name.upper()}</b>...\n✅ Done: `{done}`")
+            except: pass
+
+    try:
+        done = await migrate_file_ids(progress=progress)
+    except Exception as e:
+        return await msg.edit(f"❌ Migration stopped: {e}\nRun /migrateids again to resume.")
+    await msg.edit(
+        f"✅ Migrated `{done}` files in {get_readable_time(time_now() - start)}\n"
+        "Set <code>FILE_ID_MODE=binary</code> and /restart to rebuild local indexes."
+    )
+
+# ─────────────────────────
+# /exportindex COMMAND
+# ─────────────────────────
+@Client.on_message(filters.command("exportindex") & filters.user(ADMINS))
+async def export_index(_, message):
+    msg = await message.reply("🗺 Exporting search snapshot...")
+    start = time_now()
+    last_edit = [0]
+
+    async def progress(name, done):
+        if time_now() - last_edit[0] > 10:
+            last_edit[0] = time_now()
+            try: await msg.edit(f"🗺 Reading <b>{name.upper()}</b>...\n✅ Done: `{done}`")
+            except: pass
+
+    try:
+        count, size = await export_search_snapshot(progress=progress)
+    except Exception as e:
+        return await msg.edit(f"❌ Export failed: {e}")
+    await msg.edit(
+        f"✅ Snapshot written: `{count}` files, {get_size(size)} in {get_readable_time(time_now() - start)}\n"
+        "Set <code>SEARCH_BACKEND=snapshot</code> and /restart to load it."
+    )
+
+# ─────────────────────────
+# /topqueries COMMAND
+# ─────────────────────────
+@Client.on_message(filters.command("topqueries") & filters.user(ADMINS))
+async def topqueries(_, message):
+    # /topqueries 30 → पिछले 30 दिन (default 7)
+    try: days = int(message.command[1]) if len(message.command) > 1 else 7
+    except ValueError: days = 7
+    msg = await message.reply("📊 Aggregating query log...")
+    top, zero = await top_queries(days)
+    if not top:
+        return await msg.edit(f"📭 No searches logged in the last {days} days.")
+
+    lines = [f"📊 <b>Top Queries ({days}d)</b>\n"]
+    for i, q in enumerate(top, 1):
+        lines.append(f"{i}. <code>{q['_id']}</code> × `{q['count']}` | Results: `{q['hits']}` | ⏱ `{q['ms']:.0f}`/`{q['max_ms']:.0f}` ms")
+    if zero:
+        lines.append("\n🚫 <b>Zero Results</b>\n")
+        for i, q in enumerate(zero, 1):
+            lines.append(f"{i}. <code>{q['_id']}</code> × `{q['count']}`")
+    await msg.edit("\n".join(lines))
+
 # ─────────────────────────
 # CALLBACKS & DELETE (Standard)
 # ─────────────────────────
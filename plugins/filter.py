@@ -1,19 +1,20 @@
 import asyncio
 import re
+import time
 import math
 import random
 from hydrogram import Client, filters, enums
 from hydrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from info import (
-    ADMINS, DELETE_TIME, MAX_BTN, IS_PREMIUM, PICS
+    ADMINS, DELETE_TIME, MAX_BTN, IS_PREMIUM, PICS, SEARCH_COUNT_CAP, SPELL_CHECK
 )
 from utils import (
     is_premium, get_size, is_check_admin,
     temp, get_settings, save_group_settings
 )
 # Note: Ensure these imports exist in your project structure
-from database.ia_filterdb import get_search_results
+from database.ia_filterdb import get_search_results, prefetch_search_results, record_search
 
 # ─────────────────────────────────────────────
 # ⚡ GLOBAL CACHE (With Auto-Cleaner)
@@ -25,6 +26,21 @@ def check_cache_limit():
         BUTTONS.clear()
         temp.FILES.clear()
 
+def fmt_total(total):
+    """Capped count को '1000+' की तरह दिखाएँ - (total_text, pages_text)"""
+    pages = math.ceil(total / MAX_BTN)
+    if total >= SEARCH_COUNT_CAP:
+        return f"{total}+", f"{pages}+"
+    return str(total), str(pages)
+
+def file_line(file, chat_id):
+    """एक result line - season group हो तो 📂 expand link, वरना सीधी file"""
+    if file.get("files", 1) > 1 and file.get("group"):
+        g_link = f"https://t.me/{temp.U_NAME}?start=grp_{chat_id}_{file['group']}"
+        return f"📂 <a href='{g_link}'>[{file['files']} Files] {file['file_name']}</a>"
+    f_link = f"https://t.me/{temp.U_NAME}?start=file_{chat_id}_{file['_id']}"
+    return f"📁 <a href='{f_link}'>[{get_size(file['file_size'])}] {file['file_name']}</a>"
+
 # ─────────────────────────────────────────────
 # 🛠️ HELPER: VALIDATOR (FAST)
 # ─────────────────────────────────────────────
@@ -140,11 +156,16 @@ async def auto_filter(client, msg, collection_type="all"):
     check_cache_limit() # Free up RAM if needed
 
     search = msg.text.strip()
-    
+    # Group settings (RAM cache) - spell_check और auto_delete दोनों के लिए
+    settings = await get_settings(msg.chat.id)
+    spell_check = settings.get("spell_check", SPELL_CHECK)
+
     # ⚡ DB Call (Async Motor)
+    started = time.perf_counter()
     files, next_offset, total, actual_source = await get_search_results(
-        search, max_results=MAX_BTN, offset=0, collection_type=collection_type
+        search, max_results=MAX_BTN, offset=0, collection_type=collection_type, spell_check=spell_check
     )
+    record_search(search, actual_source, total, time.perf_counter() - started)
 
     if not files:
         # Non-blocking delete for "not found" message
@@ -159,21 +180,16 @@ async def auto_filter(client, msg, collection_type="all"):
     BUTTONS[key] = search
 
     # ⚡ Fast String Building (Join is faster than +=)
-    list_items = []
-    for file in files:
-        f_link = f"https://t.me/{temp.U_NAME}?start=file_{msg.chat.id}_{file['_id']}"
-        list_items.append(
-            f"📁 <a href='{f_link}'>[{get_size(file['file_size'])}] {file['file_name']}</a>"
-        )
+    list_items = [file_line(file, msg.chat.id) for file in files]
     files_text = "\n\n".join(list_items)
 
     # Pages Calculation
-    total_pages = math.ceil(total / MAX_BTN)
+    total_txt, total_pages = fmt_total(total)
     
     # UI Text
     cap = (
         f"<b>👑 Search: {search}\n"
-        f"🎬 Total: {total}\n"
+        f"🎬 Total: {total_txt}\n"
         f"📚 Source: {actual_source.upper()}\n"
         f"📄 Page: 1/{total_pages}</b>\n\n"
         f"{files_text}"
@@ -201,8 +217,10 @@ async def auto_filter(client, msg, collection_type="all"):
     # Send Result
     m = await msg.reply(cap, reply_markup=InlineKeyboardMarkup(btn), disable_web_page_preview=True)
 
+    # 🔮 ज्यादातर users Next दबाते हैं - page 2 पहले से cache में
+    prefetch_search_results(search, next_offset, actual_source, spell_check=spell_check)
+
     # ⚡ Non-Blocking Auto Delete
-    settings = await get_settings(msg.chat.id)
     if settings.get("auto_delete"):
         asyncio.create_task(auto_delete_msg(m, msg))
 
@@ -233,21 +251,23 @@ async def nav_handler(client, query):
     if not search:
         return await query.answer("❌ Search Expired! Search again.", show_alert=True)
 
+    settings = await get_settings(query.message.chat.id)
+    spell_check = settings.get("spell_check", SPELL_CHECK)
+
     # ⚡ DB Call
+    started = time.perf_counter()
     files, next_off, total, act_src = await get_search_results(
-        search, max_results=MAX_BTN, offset=int(offset), collection_type=coll_type
+        search, max_results=MAX_BTN, offset=int(offset), collection_type=coll_type, spell_check=spell_check
     )
+    record_search(search, act_src, total, time.perf_counter() - started, int(offset))
     if not files: return await query.answer("❌ No more pages!", show_alert=True)
 
     temp.FILES[key] = files
 
     # Build Text
-    list_items = []
-    for file in files:
-        f_link = f"https://t.me/{temp.U_NAME}?start=file_{query.message.chat.id}_{file['_id']}"
-        list_items.append(f"📁 <a href='{f_link}'>[{get_size(file['file_size'])}] {file['file_name']}</a>")
+    list_items = [file_line(file, query.message.chat.id) for file in files]
     
-    total_pages = math.ceil(total / MAX_BTN)
+    total_txt, total_pages = fmt_total(total)
     curr_page = (int(offset) // MAX_BTN) + 1
     
     # 🔥 FIXED HERE: Using variable instead of joining inside f-string
@@ -255,7 +275,7 @@ async def nav_handler(client, query):
 
     cap = (
         f"<b>👑 Search: {search}\n"
-        f"🎬 Total: {total}\n"
+        f"🎬 Total: {total_txt}\n"
         f"📚 Source: {act_src.upper()}\n"
         f"📄 Page: {curr_page}/{total_pages}</b>\n\n"
         f"{files_text}"
@@ -286,6 +306,9 @@ async def nav_handler(client, query):
         pass
     await query.answer()
 
+    # 🔮 अगला page background में
+    prefetch_search_results(search, next_off, act_src, spell_check=spell_check)
+
 # ─────────────────────────────────────────────
 # 🗂️ COLLECTION SWITCH HANDLER
 # ─────────────────────────────────────────────
@@ -305,9 +328,12 @@ async def coll_handler(client, query):
     if not search:
         return await query.answer("❌ Search Expired!", show_alert=True)
 
+    settings = await get_settings(query.message.chat.id)
+    spell_check = settings.get("spell_check", SPELL_CHECK)
+
     # ⚡ DB Call
     files, next_off, total, act_src = await get_search_results(
-        search, max_results=MAX_BTN, offset=0, collection_type=coll_type
+        search, max_results=MAX_BTN, offset=0, collection_type=coll_type, spell_check=spell_check
     )
     if not files:
         return await query.answer(f"❌ No files in {coll_type.upper()}", show_alert=True)
@@ -315,19 +341,16 @@ async def coll_handler(client, query):
     temp.FILES[key] = files
 
     # Build Text
-    list_items = []
-    for file in files:
-        f_link = f"https://t.me/{temp.U_NAME}?start=file_{query.message.chat.id}_{file['_id']}"
-        list_items.append(f"📁 <a href='{f_link}'>[{get_size(file['file_size'])}] {file['file_name']}</a>")
+    list_items = [file_line(file, query.message.chat.id) for file in files]
     
-    total_pages = math.ceil(total / MAX_BTN)
+    total_txt, total_pages = fmt_total(total)
     
     # 🔥 FIXED HERE: Using variable instead of joining inside f-string
     files_text = "\n\n".join(list_items)
 
     cap = (
         f"<b>👑 Search: {search}\n"
-        f"🎬 Total: {total}\n"
+        f"🎬 Total: {total_txt}\n"
         f"📚 Source: {act_src.upper()}\n"
         f"📄 Page: 1/{total_pages}</b>\n\n"
         f"{files_text}"
@@ -353,6 +376,9 @@ async def coll_handler(client, query):
         pass
     await query.answer()
 
+    # 🔮 अगला page background में
+    prefetch_search_results(search, next_off, act_src, spell_check=spell_check)
+
 @Client.on_callback_query(filters.regex("^close_data$"))
 async def close_cb(c, q):
     await q.message.delete()
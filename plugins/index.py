@@ -1,13 +1,15 @@
-import re
 import time
 import asyncio
+import logging
 from hydrogram import Client, filters, enums
 from hydrogram.errors import FloodWait
-from info import ADMINS
-from database.ia_filterdb import save_file
+from info import ADMINS, INDEX_BATCH_SIZE, INDEX_PREFETCH_PAGES
+from database.ia_filterdb import file_doc, save_files
+from database.users_chats_db import db
 from hydrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from utils import temp, get_readable_time
 
+logger = logging.getLogger(__name__)
 lock = asyncio.Lock()
 
 @Client.on_callback_query(filters.regex(r'^index'))
@@ -158,112 +160,228 @@ async def auto_index(bot, message):
     )
 
 
-async def index_files_to_db(lst_msg_id, chat, msg, bot, skip, collection_type="primary"):
-    start_time = time.time()
-    total_files = 0
-    duplicate = 0
-    errors = 0
-    deleted = 0
-    no_media = 0
-    unsupported = 0
-    badfiles = 0
-    current = skip
-    
+class IndexStats:
+    """Pipeline stages के shared counters + status message"""
+    # Parser इन्हें बढ़ाता है, writer बाकी (saved / duplicates / write errors)
+    PARSE_FIELDS = ("deleted", "no_media", "unsupported", "badfiles", "parse_errors")
+    WRITE_FIELDS = ("total_files", "duplicate", "errors")
+
+    def __init__(self, skip, collection_type, counters=None):
+        self.start_time = time.time()
+        self.skip = skip
+        self.current = skip
+        self.collection_type = collection_type
+        # Resume पर पिछले checkpoint के counters से शुरू
+        for field in self.PARSE_FIELDS + self.WRITE_FIELDS:
+            setattr(self, field, (counters or {}).get(field, 0))
+
+    def parsed(self):
+        return {field: getattr(self, field) for field in self.PARSE_FIELDS}
+
+    def written(self):
+        return {field: getattr(self, field) for field in self.WRITE_FIELDS}
+
+    def speed(self):
+        return (self.current - self.skip) / max(time.time() - self.start_time, 1)
+
+    def text(self, title, time_label="Completed in"):
+        return (
+            f"<b>{title}</b>\n"
+            f"📚 Collection: <code>{self.collection_type.upper()}</code>\n"
+            f"⏱ {time_label}: <code>{get_readable_time(time.time() - self.start_time)}</code>\n"
+            f"⚡ Speed: <code>{self.speed():.0f} msg/s</code>\n\n"
+            f"📨 Total Received: <code>{self.current}</code>\n"
+            f"📁 Saved Files: <code>{self.total_files}</code>\n"
+            f"🔄 Duplicates: <code>{self.duplicate}</code>\n"
+            f"🗑 Deleted: <code>{self.deleted}</code>\n"
+            f"❌ No Media: <code>{self.no_media + self.unsupported}</code>\n"
+            f"⚠️ Unsupported: <code>{self.unsupported}</code>\n"
+            f"❗ Errors: <code>{self.errors + self.parse_errors}</code>\n"
+            f"🚫 Bad Files: <code>{self.badfiles}</code>"
+        )
+
+
+# ─────────────────────────────────────────
+# ⛓ INDEXING PIPELINE: fetch → parse → write
+# ─────────────────────────────────────────
+# Network (get_messages) और DB (insert_many) एक साथ चलते हैं; bounded
+# queues backpressure देती हैं - धीमा writer fetcher को रोक देता है,
+# RAM में कभी कुछ pages / batches से ज्यादा नहीं रहता।
+PAGE_SIZE = 200
+# Progress edit का gap (सेकंड) - Telegram edit flood से बचने के लिए
+PROGRESS_INTERVAL = 5
+_DONE = object()
+
+
+async def _fetch_pages(bot, chat, lst_msg_id, skip, pages):
+    """Stage 1: 200-message pages आगे से prefetch"""
+    try:
+        current = skip
+        while current < lst_msg_id:
+            diff = min(PAGE_SIZE, lst_msg_id - current)
+            try:
+                messages = await bot.get_messages(chat, list(range(current, current + diff)))
+            except FloodWait as e:
+                await asyncio.sleep(e.value)
+                continue
+            await pages.put(messages)
+            current += diff
+        await pages.put(_DONE)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Parser तक error पहुँचे - वरना वो हमेशा wait करेगा
+        await pages.put(e)
+
+
+def _parse_message(message, stats):
+    """Media filter + DB doc; skip होने वाले messages सिर्फ गिने जाते हैं"""
+    if message.empty:
+        stats.deleted += 1
+        return None
+    if not message.media:
+        stats.no_media += 1
+        return None
+    if message.media not in [enums.MessageMediaType.VIDEO, enums.MessageMediaType.DOCUMENT]:
+        stats.unsupported += 1
+        return None
+
+    media = getattr(message, message.media.value, None)
+    if not media:
+        stats.unsupported += 1
+        return None
+
+    # Check file size - skip files under 2 MB (2097152 bytes)
+    if getattr(media, 'file_size', 0) < 2097152:
+        stats.badfiles += 1
+        return None
+
+    media.caption = message.caption
+    doc = file_doc(media)
+    if doc is None:
+        stats.parse_errors += 1
+    return doc
+
+
+async def _write_batches(batches, stats, collection_type, job_id):
+    """
+    Stage 3: हर batch एक insert_many, फिर checkpoint - batch के साथ आया
+    message id तभी save होता है जब उससे पहले के सारे docs DB में हों।
+    """
+    while True:
+        item = await batches.get()
+        if item is _DONE:
+            return
+        batch, upto, parsed = item
+        if batch:
+            try:
+                saved, dup, err = await save_files(batch, collection_type=collection_type)
+            except Exception as e:
+                logger.error(f"Index write error: {e}")
+                saved, dup, err = 0, 0, len(batch)
+            stats.total_files += saved
+            stats.duplicate += dup
+            stats.errors += err
+        try:
+            await db.checkpoint_index_job(job_id, upto, {**parsed, **stats.written()})
+        except Exception as e:
+            logger.error(f"Index checkpoint error: {e}")
+
+
+async def _show_progress(msg, stats, chat, lst_msg_id):
+    btn = [[
+        InlineKeyboardButton('CANCEL', callback_data=f'index#cancel#{chat}#{lst_msg_id}#{stats.skip}')
+    ]]
+    try:
+        await msg.edit_text(
+            text=stats.text("📊 Indexing Progress", "Time"),
+            reply_markup=InlineKeyboardMarkup(btn)
+        )
+    except FloodWait as e:
+        await asyncio.sleep(e.value)
+    except Exception:
+        pass
+
+
+async def index_files_to_db(lst_msg_id, chat, msg, bot, skip, collection_type="primary", counters=None):
+    stats = IndexStats(skip, collection_type, counters)
+
     async with lock:
+        # 💾 Job persist - restart के बाद Bot.start यहीं से resume करेगा
+        job_id = await db.start_index_job({
+            "chat": chat, "collection": collection_type, "lst_msg_id": lst_msg_id,
+            "last_id": skip, "counters": {**stats.parsed(), **stats.written()},
+            "msg_chat": msg.chat.id
+        })
+        pages = asyncio.Queue(maxsize=INDEX_PREFETCH_PAGES)
+        batches = asyncio.Queue(maxsize=2)
+        fetcher = asyncio.create_task(_fetch_pages(bot, chat, lst_msg_id, skip, pages))
+        writer = asyncio.create_task(_write_batches(batches, stats, collection_type, job_id))
+        cancelled = False
         try:
-            async for message in bot.iter_messages(chat, lst_msg_id, skip):
-                time_taken = get_readable_time(time.time()-start_time)
-                
+            # Stage 2 (parse) यहीं चलता है - pages लेकर batches भरता है
+            batch, last_edit = [], time.time()
+            while True:
+                page = await pages.get()
+                if page is _DONE:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                for message in page:
+                    stats.current += 1
+                    doc = _parse_message(message, stats)
+                    if doc is not None:
+                        batch.append(doc)
+                # Batch भरा हो (या खाली - सिर्फ checkpoint) तो writer को, इस page तक के counters के साथ
+                if len(batch) >= INDEX_BATCH_SIZE or not batch:
+                    await batches.put((batch, stats.current, stats.parsed()))
+                    batch = []
+
                 if temp.CANCEL:
                     temp.CANCEL = False
-                    await msg.edit(
-                        f"<b>✅ Successfully Cancelled!</b>\n"
-                        f"📚 Collection: <code>{collection_type.upper()}</code>\n"
-                        f"⏱ Completed in: <code>{time_taken}</code>\n\n"
-                        f"📁 Saved Files: <code>{total_files}</code>\n"
-                        f"🔄 Duplicates: <code>{duplicate}</code>\n"
-                        f"🗑 Deleted: <code>{deleted}</code>\n"
-                        f"❌ No Media: <code>{no_media + unsupported}</code>\n"
-                        f"⚠️ Unsupported: <code>{unsupported}</code>\n"
-                        f"❗ Errors: <code>{errors}</code>\n"
-                        f"🚫 Bad Files: <code>{badfiles}</code>"
-                    )
-                    return
-                
-                current += 1
-                
-                if current % 30 == 0:
-                    btn = [[
-                        InlineKeyboardButton('CANCEL', callback_data=f'index#cancel#{chat}#{lst_msg_id}#{skip}')
-                    ]]
-                    try:
-                        await msg.edit_text(
-                            text=f"<b>📊 Indexing Progress</b>\n"
-                            f"📚 Collection: <code>{collection_type.upper()}</code>\n"
-                            f"⏱ Time: <code>{time_taken}</code>\n\n"
-                            f"📨 Total Received: <code>{current}</code>\n"
-                            f"📁 Saved: <code>{total_files}</code>\n"
-                            f"🔄 Duplicates: <code>{duplicate}</code>\n"
-                            f"🗑 Deleted: <code>{deleted}</code>\n"
-                            f"❌ No Media: <code>{no_media + unsupported}</code>\n"
-                            f"⚠️ Unsupported: <code>{unsupported}</code>\n"
-                            f"❗ Errors: <code>{errors}</code>\n"
-                            f"🚫 Bad Files: <code>{badfiles}</code>", 
-                            reply_markup=InlineKeyboardMarkup(btn)
-                        )
-                    except FloodWait as e:
-                        await asyncio.sleep(e.value)
-                    except Exception:
-                        pass
-                
-                if message.empty:
-                    deleted += 1
-                    continue
-                elif not message.media:
-                    no_media += 1
-                    continue
-                elif message.media not in [enums.MessageMediaType.VIDEO, enums.MessageMediaType.DOCUMENT]:
-                    unsupported += 1
-                    continue
-                
-                media = getattr(message, message.media.value, None)
-                if not media:
-                    unsupported += 1
-                    continue
-                
-                # Check file size - skip files under 2 MB (2097152 bytes)
-                file_size = getattr(media, 'file_size', 0)
-                if file_size < 2097152:  # 2 MB in bytes
-                    badfiles += 1
-                    continue
-                
-                media.caption = message.caption
-                file_name = re.sub(r"@\w+|(_|\-|\.|\+)", " ", str(media.file_name))
-                
-                # Save to selected collection
-                sts = await save_file(media, collection_type=collection_type)
-                
-                if sts == 'suc':
-                    total_files += 1
-                elif sts == 'dup':
-                    duplicate += 1
-                elif sts == 'err':
-                    errors += 1
-                    
+                    cancelled = True
+                    break
+                if time.time() - last_edit >= PROGRESS_INTERVAL:
+                    last_edit = time.time()
+                    await _show_progress(msg, stats, chat, lst_msg_id)
+
+            # बचे docs लिखकर writer खत्म होने तक रुकें
+            if batch:
+                await batches.put((batch, stats.current, stats.parsed()))
+            await batches.put(_DONE)
+            await writer
         except Exception as e:
+            await db.finish_index_job(job_id, "failed")
             await msg.reply(f'❌ Index canceled due to Error - {e}')
+            return
+        finally:
+            # Restart (CancelledError) पर job "running" रहता है → resume
+            fetcher.cancel()
+            writer.cancel()
+
+        await db.finish_index_job(job_id, "cancelled" if cancelled else "done")
+        if cancelled:
+            await msg.edit(stats.text("✅ Successfully Cancelled!"))
         else:
-            time_taken = get_readable_time(time.time()-start_time)
-            await msg.edit(
-                f'<b>✅ Successfully Indexed!</b>\n'
-                f'📚 Collection: <code>{collection_type.upper()}</code>\n'
-                f'⏱ Completed in: <code>{time_taken}</code>\n\n'
-                f'📁 Saved Files: <code>{total_files}</code>\n'
-                f'🔄 Duplicates: <code>{duplicate}</code>\n'
-                f'🗑 Deleted: <code>{deleted}</code>\n'
-                f'❌ No Media: <code>{no_media + unsupported}</code>\n'
-                f'⚠️ Unsupported: <code>{unsupported}</code>\n'
-                f'❗ Errors: <code>{errors}</code>\n'
-                f'🚫 Bad Files: <code>{badfiles}</code>'
-            )
+            await msg.edit(stats.text("✅ Successfully Indexed!"))
+
 
+async def resume_index_jobs(bot):
+    """Bot.start से - restart में अधूरे रहे jobs आखिरी checkpoint से, एक-एक करके"""
+    try:
+        jobs = await db.get_running_index_jobs()
+    except Exception as e:
+        logger.error(f"Index jobs load error: {e}")
+        return
+    for job in jobs:
+        try:
+            msg = await bot.send_message(
+                job["msg_chat"],
+                f"♻️ <b>Resuming Indexing</b> to <b>{job['collection'].upper()}</b> "
+                f"from message <code>{job['last_id']}</code>..."
+            )
+            await index_files_to_db(
+                job["lst_msg_id"], job["chat"], msg, bot, job["last_id"], job["collection"], job.get("counters")
+            )
+        except Exception as e:
+            logger.error(f"Index resume failed for {job['_id']}: {e}")
@@ -6,6 +6,7 @@ from hydrogram import Client, filters, enums
 from hydrogram.errors import MessageTooLong
 from info import ADMINS, LOG_CHANNEL, PICS
 from database.users_chats_db import db
+from database.ia_filterdb import flush_counters
 from utils import temp, get_settings
 from Script import script
 
@@ -53,6 +54,8 @@ async def restart_bot(bot, message):
     msg = await message.reply("🔄 Restarting...")
     with open('restart.txt', 'w+') as file:
         file.write(f"{msg.chat.id} {msg.id}")
+    # RAM counters (downloads / hot queries) खोने न पाएं
+    await flush_counters()
     os.execl(sys.executable, sys.executable, "bot.py")
 
 